@@ -0,0 +1,105 @@
+"""
+Rendimiento de la serialización JSON de GET /items/<type_item> (listado) y
+GET /items/<type_item>/<uid> (detalle).
+
+Compara:
+- codificación de una página de filas: dict por fila + build_result + json
+  (camino anterior) frente a ItemEncoder, con json y con orjson;
+- peticiones completas de detalle con el proveedor de Flask por defecto
+  frente a FastJSONProvider. El listado ya no pasa por el proveedor (lo
+  codifica ItemEncoder), así que su comparación es la de la página de filas.
+
+Uso: python benchmarks/json_payloads.py [--items 2000] [--requests 300]
+Usa una base SQLite temporal; no toca DATABASE_URL.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("CACHE_BACKEND", "none")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+import serializers  # noqa: E402
+from app import app  # noqa: E402
+from models import db, Item, SearchIndex, COMMON_PROPERTIES, PEOPLE_PROPERTIES, build_result  # noqa: E402
+
+ORJSON = serializers.orjson
+
+
+def load_items(count):
+    items = []
+    for n in range(count):
+        prop = {column: f"value {n}" for column in ("created", "edited", "url")}
+        prop.update({f"propertie_{i}": f"{i}{n}" for i in range(1, 10)})
+        items.append({"type_item": "people", "prop_id": f"bench{n}", "uid": str(n),
+                      "description": "A person within the Star Wars universe",
+                      "version": 1, "properties": prop})
+    with app.app_context():
+        db.create_all()
+        SearchIndex.ensure()
+        report = Item.bulk_load(items)
+    print(f"Items cargados: {report['inserted']}")
+
+
+def timed(label, fn, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<46} {number / elapsed:>10.0f} ops/s")
+
+
+def bench_encoding(limit, number):
+    with app.app_context():
+        ok, rows = Item.list_with_properties("people", limit)
+
+    def previous():
+        results = [build_result(row, row, PEOPLE_PROPERTIES)
+                   for row in [dict(row._mapping) for row in rows]]
+        return json.dumps({"results": results, "next": None},
+                          sort_keys=True, separators=(",", ":")).encode()
+
+    def encoder():
+        return serializers.ItemEncoder(PEOPLE_PROPERTIES, COMMON_PROPERTIES).page(rows, None)
+
+    print(f"\nPágina de {len(rows)} filas")
+    timed("dict + build_result + json (anterior)", previous, number)
+    serializers.orjson = None
+    timed("ItemEncoder + json", encoder, number)
+    serializers.orjson = ORJSON
+    if ORJSON is not None:
+        timed("ItemEncoder + orjson", encoder, number)
+
+
+def bench_requests(number):
+    client = app.test_client()
+    url = "/items/people/1"
+    modes = [("Flask por defecto", DefaultJSONProvider, None)]
+    if ORJSON is not None:
+        modes.append(("FastJSONProvider (orjson)", serializers.FastJSONProvider, ORJSON))
+    print("\nPeticiones completas")
+    for label, provider, encoder in modes:
+        app.json = provider(app)
+        serializers.orjson = encoder
+        assert client.get(url).status_code == 200
+        timed(f"detalle: {label}", lambda: client.get(url), number)
+    serializers.orjson = ORJSON
+    app.json = serializers.FastJSONProvider(app)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+    print(f"orjson: {'sí' if ORJSON is not None else 'no instalado'}")
+    load_items(args.items)
+    bench_encoding(args.limit, args.requests * 5)
+    bench_requests(args.requests)
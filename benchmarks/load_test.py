@@ -0,0 +1,130 @@
+"""
+Prueba de carga: modo WSGI (gunicorn, workers síncronos con hilos) frente a
+modo ASGI (uvicorn con asgi.application) sobre los mismos endpoints de lectura.
+
+Levanta cada servidor con la misma base, lanza --concurrency peticiones en
+paralelo durante --duration segundos y muestra peticiones/s, p50 y p99.
+
+Uso: python benchmarks/load_test.py [--concurrency 100] [--duration 10]
+Sin DATABASE_URL usa una base SQLite temporal con items generados.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SRC = os.path.join(ROOT, "src")
+PORT = 3901
+
+
+def seed(env, count):
+    # Crea las tablas y carga count items en la base de env["DATABASE_URL"]
+    script = (
+        "from app import app\n"
+        "from models import db, Item, SearchIndex\n"
+        "items = [{'type_item': 'people', 'prop_id': f'load{n}', 'uid': str(n),\n"
+        "          'description': 'A person within the Star Wars universe', 'version': 1,\n"
+        "          'properties': {'propertie_1': f'Person {n}', 'propertie_5': str(150 + n % 60)}}\n"
+        f"         for n in range({count})]\n"
+        "with app.app_context():\n"
+        "    db.create_all()\n"
+        "    SearchIndex.ensure()\n"
+        "    print(Item.bulk_load(items))\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=SRC, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def server_command(mode, workers, threads):
+    if mode == "wsgi":
+        return ["gunicorn", "wsgi", "--chdir", SRC, "-b", f"127.0.0.1:{PORT}",
+                "-w", str(workers), "--threads", str(threads), "--log-level", "warning"]
+    return ["uvicorn", "asgi:application", "--app-dir", SRC, "--port", str(PORT),
+            "--workers", str(workers), "--log-level", "warning"]
+
+
+def wait_ready(timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{PORT}/items/people/1", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def check_cors(paths):
+    # Ambos modos deben devolver las cabeceras CORS de CORS(app) en todas las rutas
+    origin = "http://localhost:3000"
+    for path in sorted(set(paths)):
+        response = httpx.get(f"http://127.0.0.1:{PORT}{path}", headers={"Origin": origin}, timeout=10)
+        if response.headers.get("Access-Control-Allow-Origin") != origin:
+            raise RuntimeError(f"Missing CORS headers on {path}")
+
+
+async def run_load(paths, concurrency, duration):
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=30) as client:
+        async def worker(offset):
+            nonlocal errors
+            n = offset
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(paths[n % len(paths)])
+                    if response.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+                n += 1
+        await asyncio.gather(*[worker(i) for i in range(concurrency)])
+    return latencies, errors
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4, help="hilos por worker en modo WSGI")
+    args = parser.parse_args()
+
+    env = dict(os.environ, CACHE_BACKEND="none")
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}")
+    seed(env, args.items)
+    paths = [f"/items/people/{n}" for n in range(0, args.items, 7)]
+    paths += ["/items/people?limit=20", "/items/people?sort=-height&limit=20", "/search?q=person"]
+
+    print(f"{'modo':<6} {'peticiones/s':>13} {'p50 ms':>9} {'p99 ms':>9} {'errores':>8}")
+    for mode in ("wsgi", "asgi"):
+        server = subprocess.Popen(server_command(mode, args.workers, args.threads), env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_ready()
+            check_cors(paths[:1] + paths[-3:] + ["/user"])
+            latencies, errors = asyncio.run(run_load(paths, args.concurrency, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{mode:<6} {len(latencies) / args.duration:>13.0f} "
+              f"{percentile(latencies, 0.50) * 1000:>9.1f} {percentile(latencies, 0.99) * 1000:>9.1f} {errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Latencia de GET /search con muchos items cuyas descripciones se repiten
+(como las de SWAPI: "A person within the Star Wars universe"), de modo que
+las palabras comunes coinciden con toda la tabla.
+
+Muestra la mediana y el p95 de cada consulta, con y sin offset. /search solo
+ordena SEARCH_CANDIDATES coincidencias (500 por defecto); el offset más alto
+es la última página dentro de ese límite.
+
+Uso: python benchmarks/search.py [--items 100000] [--requests 50]
+Usa una base SQLite temporal; no toca DATABASE_URL.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "search.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("CACHE_BACKEND", "none")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from app import app  # noqa: E402
+from models import db, Item, SearchIndex  # noqa: E402
+
+NAMES = ["Luke Skywalker", "Leia Organa", "Han Solo", "Darth Vader", "Star Destroyer pilot",
+         "Obi-Wan Kenobi", "Padme Amidala", "Wedge Antilles", "Mon Mothma", "Boba Fett"]
+
+QUERIES = [
+    ("person", 0), ("person", 480), ("star wars", 0), ("star", 0),
+    ("luke", 0), ("skywalker 42", 0), ("univ", 0),
+]
+
+
+def load_items(count):
+    items = [{"type_item": "people", "prop_id": f"search{n}", "uid": str(n),
+              "description": "A person within the Star Wars universe", "version": 1,
+              "properties": {"propertie_1": f"{NAMES[n % len(NAMES)]} {n}"}}
+             for n in range(count)]
+    with app.app_context():
+        db.create_all()
+        SearchIndex.ensure()
+        report = Item.bulk_load(items, batch_size=5000)
+    print(f"Items cargados: {report['inserted']}")
+
+
+def bench(number):
+    client = app.test_client()
+    print(f"{'consulta':<24} {'mediana ms':>11} {'p95 ms':>9} {'resultados':>11}")
+    for query, offset in QUERIES:
+        url = f"/search?q={query}&offset={offset}"
+        response = client.get(url)
+        assert response.status_code == 200, response.json
+        times = []
+        for _ in range(number):
+            start = time.perf_counter()
+            client.get(url)
+            times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        label = f"{query} (offset {offset})"
+        print(f"{label:<24} {statistics.median(times):>11.1f} "
+              f"{times[int(len(times) * 0.95) - 1]:>9.1f} {len(response.json['results']):>11}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+    load_items(args.items)
+    bench(args.requests)
@@ -0,0 +1,81 @@
+"""
+Tiempo de arranque: importación de app.py y latencia de la primera petición,
+como lo vería un worker de gunicorn recién creado.
+
+Cada ronda es un proceso nuevo. Muestra la mediana y el máximo de --runs
+rondas y los módulos que más tardan en importarse (python -X importtime).
+
+Uso: python benchmarks/startup.py [--runs 5] [--top 10]
+Sin DATABASE_URL usa una base SQLite temporal.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Se ejecuta en cada proceso nuevo; imprime los tiempos como JSON
+PROBE = """
+import json, time
+start = time.perf_counter()
+from app import app
+imported = time.perf_counter()
+client = app.test_client()
+response = client.get("/items/people?limit=1")
+first = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_request": first - imported,
+                  "status": response.status_code}))
+"""
+
+
+def run_probe(env):
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=SRC, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def top_imports(env, count):
+    # (acumulado en µs, módulo) de los módulos de primer nivel más lentos
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=SRC, env=env,
+                            check=True, capture_output=True, text=True).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Solo los importados directamente por app.py (dos espacios de sangría)
+        if name.startswith("   ") and not name.startswith("    "):
+            modules.append((int(cumulative), name.strip()))
+    return sorted(modules, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if "DATABASE_URL" not in env:
+        path = os.path.join(tempfile.mkdtemp(), "startup.db")
+        env["DATABASE_URL"] = f"sqlite:///{path}"
+        subprocess.run([sys.executable, "-c", "from app import app\nfrom models import db\n"
+                        "with app.app_context(): db.create_all()"],
+                       cwd=SRC, env=env, check=True, capture_output=True)
+
+    results = [run_probe(env) for _ in range(args.runs)]
+    for key in ("import", "first_request"):
+        values = [result[key] * 1000 for result in results]
+        print(f"{key:<14} mediana {statistics.median(values):8.1f} ms   máx {max(values):8.1f} ms")
+
+    print("\nMódulos más lentos importados por app.py (acumulado):")
+    for cumulative, name in top_imports(env, args.top):
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -38,6 +38,18 @@ def get_metadata():
     return target_db.metadata
 
 
+# tables managed outside the models (e.g. the full-text index item_search,
+# which may be an FTS5 virtual table) are ignored by autogenerate
+UNMANAGED_TABLES = {'item_search'}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    table = object if type_ == 'table' else getattr(object, 'table', None)
+    if table is not None and table.name in UNMANAGED_TABLES:
+        return False
+    return not (type_ == 'table' and name.startswith('item_search_'))
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -52,7 +64,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -84,6 +97,7 @@ def run_migrations_online():
             connection=connection,
             target_metadata=get_metadata(),
             process_revision_directives=process_revision_directives,
+            include_object=include_object,
             **current_app.extensions['migrate'].configure_args
         )
 
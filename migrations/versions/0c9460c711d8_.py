@@ -0,0 +1,51 @@
+"""empty message
+
+Revision ID: 0c9460c711d8
+Revises: 1dd4be3533a0
+Create Date: 2026-10-18 15:05:52.918347
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c9460c711d8'
+down_revision = '1dd4be3533a0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Índice de texto completo sobre nombre y descripción de los items:
+    # FTS5 en SQLite, tsvector + GIN en PostgreSQL
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS item_search USING fts5("
+            "prop_id UNINDEXED, type_item UNINDEXED, uid UNINDEXED, name, description, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    else:
+        op.execute(
+            "CREATE TABLE IF NOT EXISTS item_search ("
+            "prop_id VARCHAR(50) PRIMARY KEY REFERENCES item (prop_id), "
+            "type_item VARCHAR(50) NOT NULL, uid VARCHAR(50) NOT NULL, "
+            "name VARCHAR(255) NOT NULL, description VARCHAR(255) NOT NULL, "
+            "document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'B')) STORED)"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS ix_item_search_document ON item_search USING GIN (document)")
+
+    # Indexar los items existentes (el nombre está en propertie_1 o propertie_3 según el tipo)
+    op.execute(
+        "INSERT INTO item_search (prop_id, type_item, uid, name, description) "
+        "SELECT item.prop_id, item.type_item, item.uid, "
+        "CASE lower(item.type_item) WHEN 'people' THEN properties.propertie_1 "
+        "WHEN 'planets' THEN properties.propertie_3 ELSE '' END, item.description "
+        "FROM item JOIN properties ON properties.propertie_id = item.prop_id"
+    )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS item_search")
@@ -56,5 +56,11 @@ result_obj = {"items": all_items}
 with open('/workspaces/DataModeling-Blog-StarWars/src/Components/items.txt', 'w') as f:
     f.write(json.dumps(result_obj, indent=4))
 
+# Guarda también una versión NDJSON (un item por línea) para la carga en streaming:
+# curl -X POST -H "Content-Type: application/x-ndjson" --data-binary @items.ndjson <host>/items
+with open('/workspaces/DataModeling-Blog-StarWars/src/Components/items.ndjson', 'w') as f:
+    for item in all_items:
+        f.write(json.dumps(item) + "\n")
+
 # Ejemplo de impresión (opcional)
 print("Archivo items.txt creado correctamente.")
\ No newline at end of file
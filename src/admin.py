@@ -1,19 +1,67 @@
 import os
-from flask_admin import Admin
+import threading
+from flask import Flask
 from models import db, User, Item, Properties, Favorites
-from flask_admin.contrib.sqla import ModelView
+from pool import admin_engine_options
+
+# Filas por página en las listas del admin
+ADMIN_PAGE_SIZE = int(os.environ.get('ADMIN_PAGE_SIZE', 20))
 
 def setup_admin(app):
+    # flask_admin se importa aquí: no se carga si no se usa el admin
+    from flask_admin import Admin
+    from flask_admin.contrib.sqla import ModelView
+
+    class PagedModelView(ModelView):
+        # Páginas de tamaño fijo ordenadas por la clave primaria y sin
+        # COUNT(*): el paginador simple solo ofrece anterior/siguiente
+        page_size = ADMIN_PAGE_SIZE
+        can_set_page_size = False
+        column_default_sort = ("id", True)
+        simple_list_pager = True
+
     app.secret_key = os.environ.get('FLASK_APP_KEY', 'sample key')
     app.config['FLASK_ADMIN_SWATCH'] = 'cerulean'
     admin = Admin(app, name='4Geeks Admin', template_mode='bootstrap3')
 
-    
+
     # Add your models here, for example this is how we add a the User model to the admin
-    admin.add_view(ModelView(User, db.session))
-    admin.add_view(ModelView(Item, db.session))
-    admin.add_view(ModelView(Properties, db.session))
-    admin.add_view(ModelView(Favorites, db.session))
+    admin.add_view(PagedModelView(User, db.session))
+    admin.add_view(PagedModelView(Item, db.session))
+    admin.add_view(PagedModelView(Properties, db.session))
+    admin.add_view(PagedModelView(Favorites, db.session))
 
     # You can duplicate that line to add mew models
-    # admin.add_view(ModelView(YourModelName, db.session))
\ No newline at end of file
+    # admin.add_view(PagedModelView(YourModelName, db.session))
+
+def create_admin_app(app):
+    # App Flask aparte para el admin, con la misma base que app
+    admin_app = Flask(__name__)
+    for key in ('SQLALCHEMY_DATABASE_URI', 'SQLALCHEMY_TRACK_MODIFICATIONS'):
+        admin_app.config[key] = app.config[key]
+    # Motor propio con pool mínimo: no suma otro pool completo por worker
+    admin_app.config['SQLALCHEMY_ENGINE_OPTIONS'] = admin_engine_options(app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+    db.init_app(admin_app)
+    setup_admin(admin_app)
+    return admin_app
+
+class LazyAdmin:
+    # Middleware WSGI que monta el admin en la primera petición a /admin.
+    # Flask no permite registrar rutas en app una vez que ya atendió
+    # peticiones, por eso el admin es una app aparte.
+    def __init__(self, app, prefix='/admin'):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.prefix = prefix
+        self.admin_app = None
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path == self.prefix or path.startswith(self.prefix + '/'):
+            if self.admin_app is None:
+                with self._lock:
+                    if self.admin_app is None:
+                        self.admin_app = create_admin_app(self.app)
+            return self.admin_app(environ, start_response)
+        return self.wsgi_app(environ, start_response)
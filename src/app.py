@@ -1,18 +1,27 @@
 """
 This module takes care of starting the API Server, Loading the DB and Adding the endpoints
 """
+import hashlib
+import click
 import os
-from flask import Flask, request, jsonify, url_for
+import threading
+import time
+from flask import Flask, request, jsonify, url_for, g
 from flask_migrate import Migrate
-from flask_swagger import swagger
 from flask_cors import CORS
-from utils import APIException, generate_sitemap
-from admin import setup_admin
-from models import db, User, Item, Properties, Favorites
+from utils import APIException, generate_sitemap, iter_ndjson, encode_cursor, decode_cursor
+from cache import make_cache, cache_key
+from autocomplete import PrefixIndex
+from serializers import FastJSONProvider, ItemEncoder
+from pool import engine_options, pool_metrics
+from admin import LazyAdmin
+from models import db, User, Item, Favorites, ItemAttribute, SearchIndex, ItemDocument, PROPERTY_MAPS, PROPERTIE_COLUMNS, NUMERIC_PROPERTIES, ATTRIBUTE_OPERATORS, COMMON_PROPERTIES, build_result
 from datetime import datetime, timezone
 
 app = Flask(__name__)
 app.url_map.strict_slashes = False
+# jsonify y request.get_json con orjson si está instalado
+app.json = FastJSONProvider(app)
 
 db_url = os.getenv("DATABASE_URL")
 if db_url is not None:
@@ -20,11 +29,148 @@ if db_url is not None:
 else:
     app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:////tmp/test.db"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Pool de conexiones por worker: workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW + 1)
+# debe caber en max_connections; el +1 es el pool mínimo del admin
+# (admin_engine_options), si está activo. DB_POOL_MODE=external usa NullPool
+# y deja el reparto de conexiones a un pooler local (PgBouncer)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+    mode=os.getenv("DB_POOL_MODE", "internal"),
+    pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+    timeout=int(os.getenv("DB_POOL_TIMEOUT", 30)),
+    recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+    pre_ping=os.getenv("DB_POOL_PRE_PING", "1") == "1")
+# Réplica de lectura opcional: los GET se sirven desde ella y las escrituras
+# van al primario. Tras una escritura el cliente lee del primario durante
+# READ_YOUR_WRITES_SECONDS (cookie); la cabecera X-Read-Primary: 1 lo fuerza
+replica_url = os.getenv("DATABASE_REPLICA_URL")
+if replica_url is not None:
+    app.config['SQLALCHEMY_BINDS'] = {"replica": {
+        "url": replica_url.replace("postgres://", "postgresql://"),
+        **app.config['SQLALCHEMY_ENGINE_OPTIONS']}}
+app.config['READ_YOUR_WRITES_SECONDS'] = int(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+# Interfaz /admin/ (Flask-Admin); se monta en la primera petición que la usa
+app.config['ENABLE_ADMIN'] = os.getenv("ENABLE_ADMIN", "1") == "1"
+# Tamaño de lote para la carga masiva de items (POST /items)
+app.config['INGEST_BATCH_SIZE'] = int(os.getenv("INGEST_BATCH_SIZE", 500))
+# Tamaño de página por defecto y máximo de GET /items/<type_item>
+app.config['LIST_PAGE_SIZE'] = int(os.getenv("LIST_PAGE_SIZE", 20))
+app.config['LIST_MAX_PAGE_SIZE'] = int(os.getenv("LIST_MAX_PAGE_SIZE", 100))
+# Autocompletado: el índice se construye en la primera consulta de cada
+# worker; cada cuántos segundos reconstruirlo para recoger escrituras hechas
+# en otros workers
+app.config['AUTOCOMPLETE_REFRESH'] = int(os.getenv("AUTOCOMPLETE_REFRESH", 300))
+# Coincidencias que /search ordena por relevancia (y a las que puede paginar)
+app.config['SEARCH_CANDIDATES'] = int(os.getenv("SEARCH_CANDIDATES", 500))
+# Permite ?explain=1 en los listados para ver el plan de la consulta
+app.config['QUERY_PLAN_DEBUG'] = os.getenv("QUERY_PLAN_DEBUG", "0") == "1"
+# Tamaño de lote (una transacción cada uno) de PATCH y DELETE /items
+app.config['BULK_CHUNK_SIZE'] = int(os.getenv("BULK_CHUNK_SIZE", 500))
+# Máximo de claves por petición en POST /items/batch
+app.config['BATCH_MAX_KEYS'] = int(os.getenv("BATCH_MAX_KEYS", 100))
+# Caché de lecturas de items y favoritos: backend (memory, shared o none),
+# número de entradas, segundos de vida y archivo del backend compartido.
+# Con varios workers (WEB_CONCURRENCY, que leen gunicorn y uvicorn) la caché
+# por defecto es la compartida: con una por proceso una escritura solo
+# invalidaría la del worker que la atendió
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+app.config['CACHE_BACKEND'] = os.getenv("CACHE_BACKEND", "shared" if WEB_CONCURRENCY > 1 else "memory")
+app.config['ITEM_CACHE_SIZE'] = int(os.getenv("ITEM_CACHE_SIZE", 1024))
+app.config['ITEM_CACHE_TTL'] = int(os.getenv("ITEM_CACHE_TTL", 300))
+app.config['CACHE_PATH'] = os.getenv("CACHE_PATH", "/tmp/starwars-cache.sqlite3")
+# Segundos tras una invalidación en los que no se vuelve a guardar la clave.
+# Con réplica, las lecturas de la réplica también llenan la caché: el valor
+# debe ser al menos el retraso de la réplica (el mismo supuesto que
+# READ_YOUR_WRITES_SECONDS). Si es menor, la réplica no llena la caché.
+app.config['CACHE_TOMBSTONE_TTL'] = int(os.getenv("CACHE_TOMBSTONE_TTL", 10))
+# Documentos JSON de cada item guardados al escribir (tabla item_document);
+# GET /items/<type_item>/<uid> los devuelve sin reconstruir la respuesta
+app.config['ITEM_DOCUMENTS'] = os.getenv("ITEM_DOCUMENTS", "0") == "1"
 
 MIGRATE = Migrate(app, db)
 db.init_app(app)
 CORS(app)
-setup_admin(app)
+if app.config['ENABLE_ADMIN']:
+    app.wsgi_app = LazyAdmin(app)
+ItemDocument.enabled = app.config['ITEM_DOCUMENTS']
+read_cache = make_cache(
+    app.config['CACHE_BACKEND'],
+    maxsize=app.config['ITEM_CACHE_SIZE'],
+    ttl=app.config['ITEM_CACHE_TTL'],
+    path=app.config['CACHE_PATH'],
+    tombstone_ttl=app.config['CACHE_TOMBSTONE_TTL'])
+
+# El índice de búsqueda es una tabla fuera de los modelos: se crea si falta
+@app.before_request
+def ensure_search_index():
+    SearchIndex.ensure()
+
+READ_PRIMARY_COOKIE = "read_primary_until"
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+@app.before_request
+def route_reads():
+    # Las lecturas van a la réplica salvo que el cliente haya escrito hace poco;
+    # read_primary marca las que se forzaron al primario por ese motivo
+    g.use_replica = g.read_primary = False
+    if "replica" not in app.config.get('SQLALCHEMY_BINDS', {}) or request.method not in ("GET", "HEAD"):
+        return
+    g.use_replica = reads_from_replica(request.cookies, request.headers)
+    g.read_primary = not g.use_replica
+
+def reads_from_replica(cookies, headers):
+    # False si el cliente escribió hace poco (cookie) o pide el primario (cabecera)
+    read_primary_until = cookies.get(READ_PRIMARY_COOKIE, "")
+    recent_write = read_primary_until.isdigit() and int(read_primary_until) > time.time()
+    return not recent_write and headers.get("X-Read-Primary") != "1"
+
+def cache_get(key):
+    # Quien pidió el primario (escribió hace poco) no lee de la caché
+    if g.get("read_primary"):
+        return None
+    return read_cache.get(key)
+
+def cache_set(key, value):
+    # Lo leído de la réplica se guarda si la marca de invalidación dura más que
+    # su retraso: hasta entonces set() de esa clave no tiene efecto
+    if not g.get("use_replica") or replica_fills_cache():
+        read_cache.set(key, value)
+
+def replica_fills_cache():
+    return app.config['CACHE_TOMBSTONE_TTL'] >= app.config['READ_YOUR_WRITES_SECONDS']
+
+@app.after_request
+def stick_to_primary(response):
+    # Read-your-writes: tras una escritura correcta, leer del primario un tiempo
+    seconds = app.config['READ_YOUR_WRITES_SECONDS']
+    if ("replica" in app.config.get('SQLALCHEMY_BINDS', {}) and seconds > 0
+            and request.method in WRITE_METHODS and response.status_code < 400):
+        response.set_cookie(READ_PRIMARY_COOKIE, str(int(time.time()) + seconds),
+                            max_age=seconds, httponly=True, samesite="Lax")
+    return response
+
+@app.cli.command("rebuild-search")
+def rebuild_search():
+    """Regenera el índice de búsqueda de texto completo."""
+    print(f"Indexed {SearchIndex.rebuild()} items")
+
+@app.cli.command("diagram")
+@click.option("--output", default="diagram.png", help="Archivo de salida (.png, .pdf, .er, ...)")
+def diagram(output):
+    """Genera el diagrama entidad-relación de los modelos."""
+    # eralchemy2 (y graphviz) solo se importan al generar el diagrama
+    from eralchemy2 import render_er
+    from models import Base
+    try:
+        render_er(Base, output)
+        print(f"✅ Diagrama generado correctamente como {output}")
+    except Exception as e:
+        print("❌ Error generando el diagrama:", e)
+
+@app.cli.command("rebuild-documents")
+def rebuild_documents():
+    """Regenera los documentos JSON de todos los items (tabla item_document)."""
+    print(f"Rebuilt {ItemDocument.rebuild(app.config['INGEST_BATCH_SIZE'])} documents")
 
 # Handle/serialize errors like a JSON object
 @app.errorhandler(APIException)
@@ -36,133 +182,440 @@ def handle_invalid_usage(error):
 def sitemap():
     return generate_sitemap(app)
 
+name_index = PrefixIndex()
+# Solo un hilo construye el índice a la vez
+name_index_lock = threading.Lock()
+
+def build_name_index():
+    ok, rows = Item.list_names()
+    if ok:
+        name_index.build(rows)
+    return ok
+
+def refresh_name_index():
+    # Hilo de fondo; quien lo lanzó ya tiene name_index_lock
+    try:
+        with app.app_context():
+            build_name_index()
+    finally:
+        name_index_lock.release()
+
+def ensure_name_index():
+    # Solo la primera construcción bloquea la petición. Cuando el índice caduca
+    # se reconstruye en un hilo aparte mientras se sigue usando el actual.
+    if name_index.built_at is None:
+        with name_index_lock:
+            if name_index.built_at is None:
+                return build_name_index()
+        return True
+    stale = time.monotonic() - name_index.built_at >= app.config['AUTOCOMPLETE_REFRESH']
+    if stale and name_index_lock.acquire(blocking=False):
+        threading.Thread(target=refresh_name_index, daemon=True).start()
+    return True
+
+def invalidate_items(rows):
+    # Tras cargar un lote: limpiar la caché y agregar los nombres al autocompletado
+    read_cache.delete(*[cache_key("item", item["type_item"], item["uid"]) for item, _ in rows])
+    for item, prop in rows:
+        name_index.add(item["type_item"], item["uid"], SearchIndex.name_of(item["type_item"], prop))
+
+@app.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify(read_cache.stats()), 200
+
+@app.route('/db/pool', methods=['GET'])
+def get_pool_stats():
+    # Métricas del pool de este worker: espera en checkout y saturación
+    # ?bind=replica para el pool de la réplica
+    engine = db.engines.get(request.args.get("bind"))
+    if engine is None:
+        return jsonify({"done": False, "message": "Unknown bind"}), 404
+    return jsonify(pool_metrics(engine)), 200
+
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/jsonlines", "application/jsonl")
+
 @app.route('/items', methods=['POST'])
 def load_data():
-    data = request.get_json()
-    if not data or "items" not in data:
+    batch_size = request.args.get("batch_size", app.config['INGEST_BATCH_SIZE'], type=int)
+    if batch_size < 1:
+        return jsonify({"done": False, "message": "batch_size must be positive"}), 400
+
+    if request.mimetype in NDJSON_MIMETYPES:
+        # Modo streaming: un item por línea, procesado en lotes de batch_size
+        items = iter_ndjson(request.stream)
+    else:
+        data = request.get_json()
+        if not data or "items" not in data:
+            return jsonify({"done": False, "message": "Invalid input"}), 400
+        items = data["items"]
+
+    # Los prop_id existentes se omiten y los items inválidos se rechazan
+    report = Item.bulk_load(items, batch_size=batch_size, on_insert=invalidate_items)
+    if report["failed"]:
+        # Los lotes anteriores al fallo quedan guardados (inserted)
+        return jsonify({"done": False, "message": "Error saving items", **report}), 500
+    return jsonify({"done": True, "message": "Object was successfully", **report}), 200
+
+def get_prop_map(type_item):
+    # Seleccionar el mapeo de claves según el tipo
+    return PROPERTY_MAPS.get(type_item.lower())
+
+def parse_item_keys(data, field="items"):
+    # Lista de {"type_item": ..., "uid": ...} -> lista de tuplas, o None si no es válida
+    if not data or not isinstance(data.get(field), list):
+        return None
+    keys = []
+    for key in data[field]:
+        if not isinstance(key, dict) or "type_item" not in key or "uid" not in key:
+            return None
+        keys.append((str(key["type_item"]), str(key["uid"])))
+    return keys
+
+def parse_filters(prop_map, values):
+    # ?filter=height:gt:180&filter=name:prefix:Lu -> [(name, op, value)]
+    api_keys = {api_key for _, api_key in prop_map}
+    filters = []
+    for raw in values:
+        parts = raw.split(":", 2)
+        if len(parts) != 3:
+            raise APIException(f"Invalid filter '{raw}', expected field:op:value", payload={"done": False})
+        name, op, value = parts
+        if name not in api_keys:
+            raise APIException(f"Unknown filter field: {name}", payload={"done": False})
+        if op not in ATTRIBUTE_OPERATORS:
+            raise APIException(f"Unknown filter operator: {op}", payload={"done": False})
+        if name in NUMERIC_PROPERTIES:
+            if op == "prefix":
+                raise APIException(f"Operator prefix is not valid for numeric field {name}", payload={"done": False})
+            value = ItemAttribute.to_number(value)
+            if value is None:
+                raise APIException(f"Filter value for {name} must be numeric", payload={"done": False})
+        filters.append((name, op, value))
+    return filters
+
+def arg_int(args, name, default=None):
+    # Como request.args.get(name, default, type=int), también para los
+    # query params de Starlette en el modo ASGI
+    try:
+        return int(args[name]) if args.get(name) is not None else default
+    except ValueError:
+        return default
+
+def parse_list_args(type_item, args):
+    # Valida los parámetros de GET /items/<type_item>; lanza APIException si no son válidos
+    prop_map = get_prop_map(type_item)
+    if prop_map is None:
+        raise APIException("Invalid type_item", payload={"done": False})
+
+    limit = arg_int(args, "limit", app.config['LIST_PAGE_SIZE'])
+    if limit < 1:
+        raise APIException("limit must be positive", payload={"done": False})
+    limit = min(limit, app.config['LIST_MAX_PAGE_SIZE'])
+
+    # Proyección opcional: ?fields=name,height solo carga esas columnas
+    fields = None
+    columns = list(COMMON_PROPERTIES) + [db_key for db_key, _ in prop_map]
+    if args.get("fields"):
+        fields = {field.strip() for field in args["fields"].split(",") if field.strip()}
+        api_to_db = {api_key: db_key for db_key, api_key in prop_map}
+        api_to_db.update({key: key for key in COMMON_PROPERTIES})
+        unknown = fields - api_to_db.keys()
+        if unknown:
+            raise APIException(f"Unknown fields: {', '.join(sorted(unknown))}", payload={"done": False})
+        columns = [api_to_db[field] for field in fields]
+
+    # Filtros y orden sobre los atributos tipados: ?filter=population:gt:1e9&sort=-height
+    filters = parse_filters(prop_map, args.getlist("filter"))
+    sort = None
+    if args.get("sort"):
+        name = args["sort"].lstrip("-")
+        if name not in {api_key for _, api_key in prop_map}:
+            raise APIException(f"Unknown sort field: {name}", payload={"done": False})
+        sort = (name, args["sort"].startswith("-"))
+
+    # Paginación por cursor: "after" es el "next" de la página anterior
+    after = None
+    if args.get("after"):
+        if sort is None:
+            after = arg_int(args, "after")
+        else:
+            after = decode_cursor(args["after"])
+            after = tuple(after) if after is not None and len(after) == 2 else None
+            # (valor, id): el valor del tipo de la columna de orden o null y el id entero
+            if after is not None:
+                value, last_id = after
+                value_types = (int, float) if sort[0] in NUMERIC_PROPERTIES else (str,)
+                if (isinstance(value, bool) or not (value is None or isinstance(value, value_types))
+                        or isinstance(last_id, bool) or not isinstance(last_id, int)):
+                    after = None
+        if after is None:
+            raise APIException("Invalid cursor", payload={"done": False})
+
+    return {"prop_map": prop_map, "limit": limit, "columns": columns, "fields": fields,
+            "filters": filters, "sort": sort, "after": after}
+
+def list_page(rows, query):
+    # Cuerpo de la página a partir de limit + 1 filas
+    limit, sort = query["limit"], query["sort"]
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = last.id if sort is None else encode_cursor(last.sort_value, last.sort_id)
+    # Las filas se codifican directamente a bytes, sin build_result ni jsonify
+    return ItemEncoder(query["prop_map"], COMMON_PROPERTIES, query["fields"]).page(page, next_cursor)
+
+@app.route('/items/<type_item>', methods=['GET'])
+def list_items(type_item):
+    query = parse_list_args(type_item, request.args)
+    # Se pide un item extra para saber si hay página siguiente
+    stmt_args = (type_item, query["limit"] + 1, query["columns"], query["filters"], query["sort"], query["after"])
+    if request.args.get("explain") == "1" and app.config['QUERY_PLAN_DEBUG']:
+        return jsonify([Item.explain(stmt) for stmt in Item.list_statements(*stmt_args)]), 200
+    ok, rows = Item.list_with_properties(*stmt_args)
+    if not ok:
+        return jsonify({"done": False, "message": "Error listing items"}), 500
+    return app.response_class(list_page(rows, query), mimetype=app.json.mimetype), 200
+
+@app.route('/autocomplete', methods=['GET'])
+def autocomplete():
+    # Sugerencias por prefijo del nombre: ?q=lu&type=people&limit=10
+    prefix = request.args.get("q", "").strip()
+    if not prefix:
+        return jsonify({"done": False, "message": "q is required"}), 400
+    limit = min(request.args.get("limit", 10, type=int), app.config['LIST_MAX_PAGE_SIZE'])
+    if limit < 1:
+        return jsonify({"done": False, "message": "limit must be positive"}), 400
+    if not ensure_name_index() and name_index.built_at is None:
+        return jsonify({"done": False, "message": "Autocomplete index unavailable"}), 503
+
+    matches = name_index.complete(prefix, request.args.get("type"), limit)
+    results = [{"type_item": type_item, "uid": uid, "name": name} for type_item, uid, name in matches]
+    return jsonify({"results": results}), 200
+
+@app.route('/search', methods=['GET'])
+def search_items():
+    # Búsqueda de texto completo: ?q=luke&type=people&limit=20&offset=0
+    query, type_item, limit, offset = parse_search_args(request.args)
+    ok, rows = SearchIndex.search(query, type_item, limit + 1, offset, app.config['SEARCH_CANDIDATES'])
+    if not ok:
+        return jsonify({"done": False, "message": "Search failed"}), 500
+    return jsonify(search_page(rows, limit, offset)), 200
+
+def parse_search_args(args):
+    query = args.get("q", "").strip()
+    if not query:
+        raise APIException("q is required", payload={"done": False})
+    limit = min(arg_int(args, "limit", app.config['LIST_PAGE_SIZE']), app.config['LIST_MAX_PAGE_SIZE'])
+    offset = arg_int(args, "offset", 0)
+    if limit < 1 or offset < 0:
+        raise APIException("Invalid limit or offset", payload={"done": False})
+    return query, args.get("type"), limit, offset
+
+def search_page(rows, limit, offset):
+    # rows: hasta limit + 1 resultados de SearchIndex.search
+    results = [{key: row[key] for key in ("type_item", "uid", "name", "description")}
+               for row in rows[:limit]]
+    next_offset = offset + limit if len(rows) > limit else None
+    return {"results": results, "next": next_offset}
+
+@app.route('/items/batch', methods=['POST'])
+def get_items_batch():
+    # Lectura de varios items en una petición: {"keys": [{"type_item": ..., "uid": ...}]}
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get("keys"), list):
         return jsonify({"done": False, "message": "Invalid input"}), 400
+    if len(data["keys"]) > app.config['BATCH_MAX_KEYS']:
+        return jsonify({"done": False, "message": f"Too many keys (max {app.config['BATCH_MAX_KEYS']})"}), 400
 
-    for item in data["items"]:
-        # Validar si prop_id ya existe en la base de datos
-        exists = db.session.query(Item).filter_by(prop_id=item["prop_id"]).first()
-        if exists:
-            continue
-        # Cargar el item
-        ok_item, error_item = Item.add_item({
-            "type_item": item["type_item"],
-            "prop_id": item["prop_id"],
-            "description": item.get("description", ""),
-            "uid": item.get("uid", ""),
-            "version": item.get("version", 1)
-        })
-        if not ok_item:
-            db.session.rollback()
-            return jsonify({"done": False, "message": f"Error loading item {item.get('prop_id', '')}", "error": error_item}), 400
-        # Cargar las properties asociadas
-        prop = item.get("properties", {})
-        ok_prop, _ = Properties.add_propertie({
-            "propertie_id": prop.get("propertie_id", ""),
-            "created": prop.get("created", ""),
-            "edited": prop.get("edited", ""),
-            "propertie_1": prop.get("propertie_1", ""),
-            "propertie_2": prop.get("propertie_2", ""),
-            "propertie_3": prop.get("propertie_3", ""),
-            "propertie_4": prop.get("propertie_4", ""),
-            "propertie_5": prop.get("propertie_5", ""),
-            "propertie_6": prop.get("propertie_6", ""),
-            "propertie_7": prop.get("propertie_7", ""),
-            "propertie_8": prop.get("propertie_8", ""),
-            "propertie_9": prop.get("propertie_9", ""),
-            "url": prop.get("url", "")
-        })
-        if not ok_prop:
-            db.session.rollback()
-            return jsonify({"done": False, "message": f"Error loading properties for {prop.get('propertie_id', '')}"}), 400
-
-    return jsonify({"done": True, "message": "Object was successfully"}), 200
-
-# Mapeos de claves para properties según el tipo de item
-PEOPLE_PROPERTIES = [
-    ("propertie_1", "name"),
-    ("propertie_2", "gender"),
-    ("propertie_3", "skin_color"),
-    ("propertie_4", "hair_color"),
-    ("propertie_5", "height"),
-    ("propertie_6", "eye_color"),
-    ("propertie_7", "mass"),
-    ("propertie_8", "homeworld"),
-    ("propertie_9", "birth_year"),
-]
-
-PLANETS_PROPERTIES = [
-    ("propertie_1", "climate"),
-    ("propertie_2", "surface_water"),
-    ("propertie_3", "name"),
-    ("propertie_4", "diameter"),
-    ("propertie_5", "rotation_period"),
-    ("propertie_6", "terrain"),
-    ("propertie_7", "gravity"),
-    ("propertie_8", "orbital_period"),
-    ("propertie_9", "population"),
-]
+    keys = parse_item_keys(data, field="keys")
+    if keys is None:
+        return jsonify({"done": False, "message": "Each key needs type_item and uid"}), 400
+
+    # Primero la caché; los que falten se resuelven con una sola consulta
+    responses = {}
+    for key in set(keys):
+        cached = cache_get(cache_key("item", *key))
+        if cached is not None:
+            responses[key] = cached
+    missing = [key for key in set(keys)
+               if key not in responses and get_prop_map(key[0]) is not None]
+    ok, rows = Item.get_items_with_properties(missing)
+    if not ok:
+        return jsonify({"done": False, "message": "Error loading items"}), 500
+    for key, (item, prop) in rows.items():
+        prop_map = get_prop_map(key[0])
+        if prop and prop_map is not None:
+            responses[key] = {"result": build_result(item, prop, prop_map)}
+            cache_set(cache_key("item", *key), responses[key])
+
+    # Resultados en el orden pedido, con marcador para los no encontrados
+    results = []
+    for type_item, uid in keys:
+        response = responses.get((type_item, uid))
+        if response is not None:
+            results.append({"type_item": type_item, "uid": uid, "found": True, **response})
+        elif get_prop_map(type_item) is None:
+            results.append({"type_item": type_item, "uid": uid, "found": False, "message": "Invalid type_item"})
+        elif (type_item, uid) in rows:
+            results.append({"type_item": type_item, "uid": uid, "found": False, "message": "Properties not found"})
+        else:
+            results.append({"type_item": type_item, "uid": uid, "found": False, "message": "Item not found"})
+    return jsonify({"results": results}), 200
 
 @app.route('/items/<type_item>/<uid>', methods=['GET'])
 def get_item_by_type_and_uid(type_item, uid):
-    ok, item = Item.get_item(type_item, uid)
-    if not ok or not item:
-        return jsonify({"done": False, "message": "Item not found"}), 404
+    # Petición condicional: si el cliente ya tiene la versión actual basta con
+    # consultar Item.version y responder 304 sin cargar las properties
+    if request.if_none_match:
+        ok, version = Item.get_version(type_item, uid)
+        if ok and version is not None:
+            etag = item_etag(type_item, uid, version)
+            if request.if_none_match.contains_weak(etag):
+                response = app.response_class(status=304)
+                response.set_etag(etag)
+                return response
 
-    # Buscar las properties asociadas
-    prop_ok, prop = Properties.get_propertie(item["prop_id"])
-    if not prop_ok or not prop:
+    cached = cache_get(cache_key("item", type_item, uid))
+    if cached is not None:
+        return item_response(type_item, uid, cached)
+
+    # Documento ya serializado: una consulta y el cuerpo va directo a la respuesta
+    if app.config['ITEM_DOCUMENTS']:
+        ok, document = ItemDocument.get(type_item, uid)
+        if ok and document is not None:
+            body, version = document
+            response = app.response_class(body, mimetype=app.json.mimetype)
+            response.set_etag(item_etag(type_item, uid, version))
+            return response
+
+    # Item y properties asociadas en una sola consulta
+    ok, row = Item.get_item_with_properties(type_item, uid)
+    if not ok or not row:
+        return jsonify({"done": False, "message": "Item not found"}), 404
+    item, prop = row
+    if not prop:
         return jsonify({"done": False, "message": "Properties not found"}), 404
 
-    # Seleccionar el mapeo de claves según el tipo
-    if type_item.lower() == "people":
-        prop_map = PEOPLE_PROPERTIES
-    elif type_item.lower() == "planets":
-        prop_map = PLANETS_PROPERTIES
-    else:
+    prop_map = get_prop_map(type_item)
+    if prop_map is None:
         return jsonify({"done": False, "message": "Invalid type_item"}), 400
-
-    # Construir el dict de properties con los nombres correctos
-    properties = {
-        "created": prop["created"],
-        "edited": prop["edited"],
-        "url": prop["url"]
-    }
-    for db_key, api_key in prop_map:
-        properties[api_key] = prop[db_key]
-
-    result = {
-        "properties": properties,
-        "description": item["description"],
-        "uid": item["uid"],
-        "__v": item["version"]
-    }
+    result = build_result(item, prop, prop_map)
 
     response = {
         "result": result
     }
-    return jsonify(response), 200
+    cache_set(cache_key("item", type_item, uid), response)
+    return item_response(type_item, uid, response)
+
+def item_etag(type_item, uid, version):
+    # ETag derivado de (type_item, uid, version); update_item incrementa la versión.
+    # Empieza por la versión para poder usarlo como precondición en If-Match.
+    digest = hashlib.sha1(f"{type_item}:{uid}:{version}".encode()).hexdigest()[:16]
+    return f"{version}-{digest}"
+
+def parse_item_etag(type_item, uid, etag):
+    # Versión contenida en un ETag de este item, o None si no es válido
+    version, _, _ = etag.partition("-")
+    if not version.isdigit() or item_etag(type_item, uid, int(version)) != etag:
+        return None
+    return int(version)
+
+def item_response(type_item, uid, payload):
+    response = jsonify(payload)
+    response.set_etag(item_etag(type_item, uid, payload["result"]["__v"]))
+    return response
 
 @app.route('/items/<type_item>/<uid>', methods=['DELETE'])
 def delete_item(type_item, uid):
-    # Buscar el item por tipo y uid
-    item = db.session.query(Item).filter_by(type_item=type_item, uid=uid).first()
-    if not item:
+    # Elimina el item con sus properties, atributos y los favoritos que lo referencian
+    ok, result = Item.bulk_delete([(type_item, uid)])
+    if not ok:
+        return jsonify({"done": False, "message": "Error deleting item"}), 500
+    if not result["deleted"]:
         return jsonify({"done": False, "message": "Item not found"}), 404
+    invalidate_deleted(result)
 
-    # Eliminar las properties asociadas
-    prop = db.session.query(Properties).filter_by(propertie_id=item.prop_id).first()
-    if prop:
-        db.session.delete(prop)
+    return jsonify({"done": True, "message": "Item deleted successfully"}), 200
 
-    # Eliminar el item
-    db.session.delete(item)
-    db.session.commit()
+def invalidate_deleted(result):
+    read_cache.delete(*[cache_key("item", *key) for key in result["deleted"]])
+    read_cache.delete(*[cache_key("favorites", user_id) for user_id in result["user_ids"]])
+    for type_item, uid in result["deleted"]:
+        name_index.remove(type_item, uid)
 
-    return jsonify({"done": True, "message": "Item deleted successfully"}), 200
+@app.route('/items', methods=['DELETE'])
+def delete_items():
+    # Borrado masivo: {"keys": [{"type_item": ..., "uid": ...}]}
+    keys = parse_item_keys(request.get_json(silent=True), field="keys")
+    if keys is None:
+        return jsonify({"done": False, "message": "Each key needs type_item and uid"}), 400
+
+    ok, result = Item.bulk_delete(keys, chunk_size=app.config['BULK_CHUNK_SIZE'])
+    invalidate_deleted(result)
+    deleted = set(result["deleted"])
+    results = [{"type_item": type_item, "uid": uid,
+                "status": "deleted" if (type_item, uid) in deleted else ("not_found" if ok else "error")}
+               for type_item, uid in keys]
+    return jsonify({"done": ok, "results": results}), 200 if ok else 500
+
+@app.route('/items', methods=['PATCH'])
+def patch_items():
+    # Actualización parcial masiva:
+    # {"patches": [{"type_item", "uid", "description"?, "properties"?: {...}, "version"?}]}
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get("patches"), list):
+        return jsonify({"done": False, "message": "Invalid input"}), 400
+    keys = parse_item_keys(data, field="patches")
+    if keys is None:
+        return jsonify({"done": False, "message": "Each patch needs type_item and uid"}), 400
+    if len(set(keys)) != len(keys):
+        return jsonify({"done": False, "message": "Duplicate keys in patches"}), 400
+
+    patches = []
+    for key, patch in zip(keys, data["patches"]):
+        values, prop_values = translate_patch(key[0], patch)
+        version = patch.get("version")
+        patches.append({
+            "key": key,
+            "values": values,
+            "prop_values": prop_values,
+            "expected_version": version if isinstance(version, int) and not isinstance(version, bool) else None
+        })
+
+    ok, updated = Item.bulk_patch(patches, chunk_size=app.config['BULK_CHUNK_SIZE'])
+    read_cache.delete(*[cache_key("item", *key) for key, (status, _) in updated.items() if status == "updated"])
+    for patch in patches:
+        name = SearchIndex.name_of(patch["key"][0], patch["prop_values"])
+        if name and updated.get(patch["key"], (None,))[0] == "updated":
+            name_index.add(*patch["key"], name)
+
+    results = []
+    for type_item, uid in keys:
+        status, version = updated.get((type_item, uid), ("error", None))
+        results.append({"type_item": type_item, "uid": uid, "status": status, "version": version})
+    return jsonify({"done": ok, "results": results}), 200 if ok else 500
+
+def translate_patch(type_item, data):
+    # Traduce un cuerpo con nombres de la API a columnas de Item y Properties
+    prop_map = get_prop_map(type_item)
+    if prop_map is None:
+        raise APIException(f"Invalid type_item: {type_item}", payload={"done": False})
+    if not isinstance(data.get("properties", {}), dict):
+        raise APIException("properties must be an object", payload={"done": False})
+    values = {}
+    if "description" in data:
+        values["description"] = data["description"]
+    api_to_db = {api_key: db_key for db_key, api_key in prop_map}
+    api_to_db.update({key: key for key in COMMON_PROPERTIES})
+    prop_values = {}
+    for key, value in data.get("properties", {}).items():
+        if key not in api_to_db:
+            raise APIException(f"Unknown property: {key}", payload={"done": False})
+        prop_values[api_to_db[key]] = value
+    if not values and not prop_values:
+        raise APIException("Nothing to update", payload={"done": False})
+    return values, prop_values
 
 @app.route('/items/<type_item>/<uid>', methods=['PUT'])
 def update_item(type_item, uid):
@@ -170,42 +623,72 @@ def update_item(type_item, uid):
     if not data or "description" not in data or "properties" not in data:
         return jsonify({"done": False, "message": "Invalid input"}), 400
 
-    # Buscar el item por tipo y uid
-    item = db.session.query(Item).filter_by(type_item=type_item, uid=uid).first()
-    if not item:
-        return jsonify({"done": False, "message": "Item not found"}), 404
-
-    # Actualizar el item
-    item.description = data["description"]
-    item.version += 1
-    db.session.commit()
-    # Actualizar las properties asociadas
-    prop = db.session.query(Properties).filter_by(propertie_id=item.prop_id).first()
-    if not prop or "properties" not in data:
-        return jsonify({"done": False, "message": "Properties not found"}), 404
     # Validar que las propiedades a cambiar existan en el modelo Properties
-    valid_keys = {
-        "created", "edited", "url",
-        "propertie_1", "propertie_2", "propertie_3", "propertie_4", "propertie_5",
-        "propertie_6", "propertie_7", "propertie_8", "propertie_9"
-    }
     for key in data["properties"].keys():
-        if key not in valid_keys:
+        if key not in PROPERTIE_COLUMNS:
             return jsonify({"done": False, "message": f"La propiedad '{key}' no existe en Properties"}), 400
-    prop.created = data["properties"].get("created", prop.created)
-    prop.edited = data["properties"].get("edited", prop.edited)
-    prop.url = data["properties"].get("url", prop.url)
-    prop.propertie_1 = data["properties"].get("propertie_1", prop.propertie_1)
-    prop.propertie_2 = data["properties"].get("propertie_2", prop.propertie_2)
-    prop.propertie_3 = data["properties"].get("propertie_3", prop.propertie_3)
-    prop.propertie_4 = data["properties"].get("propertie_4", prop.propertie_4)
-    prop.propertie_5 = data["properties"].get("propertie_5", prop.propertie_5)
-    prop.propertie_6 = data["properties"].get("propertie_6", prop.propertie_6)
-    prop.propertie_7 = data["properties"].get("propertie_7", prop.propertie_7)
-    prop.propertie_8 = data["properties"].get("propertie_8", prop.propertie_8)
-    prop.propertie_9 = data["properties"].get("propertie_9", prop.propertie_9)
-    db.session.commit()
-    return jsonify({"done": True, "message": "Item updated successfully"}), 200
+
+    ok, expected_version = get_expected_version(type_item, uid, data)
+    if not ok:
+        return jsonify({"done": False, "message": "Version mismatch"}), 412
+
+    status, updated = Item.update_with_properties(
+        type_item, uid, {"description": data["description"]}, data["properties"], expected_version)
+    return update_response(type_item, uid, status, updated)
+
+@app.route('/items/<type_item>/<uid>', methods=['PATCH'])
+def patch_item(type_item, uid):
+    # Actualización parcial con los nombres de la API:
+    # {"description": ..., "properties": {"height": "180"}}; solo se escriben esas columnas
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"done": False, "message": "Invalid input"}), 400
+    values, prop_values = translate_patch(type_item, data)
+
+    ok, expected_version = get_expected_version(type_item, uid, data)
+    if not ok:
+        return jsonify({"done": False, "message": "Version mismatch"}), 412
+
+    status, updated = Item.update_with_properties(
+        type_item, uid, values, prop_values, expected_version, check_properties=False)
+    return update_response(type_item, uid, status, updated)
+
+def get_expected_version(type_item, uid, data):
+    # Versión esperada desde If-Match (ETag de GET) o desde "version" en el cuerpo.
+    # Devuelve (False, None) si If-Match no corresponde a ninguna versión de este item.
+    if request.if_match:
+        if request.if_match.star_tag:
+            return True, None
+        for etag in request.if_match.as_set():
+            version = parse_item_etag(type_item, uid, etag)
+            if version is not None:
+                return True, version
+        return False, None
+    version = data.get("version")
+    if isinstance(version, int) and not isinstance(version, bool):
+        return True, version
+    return True, None
+
+def update_response(type_item, uid, status, updated):
+    if status == "not_found":
+        # Con If-Match (incluido "*") la precondición falla si el item no existe
+        if request.if_match:
+            return jsonify({"done": False, "message": "Precondition failed: item not found"}), 412
+        return jsonify({"done": False, "message": "Item not found"}), 404
+    if status == "properties_not_found":
+        return jsonify({"done": False, "message": "Properties not found"}), 404
+    if status == "conflict":
+        return jsonify({"done": False, "message": "Version mismatch"}), 412
+    if status != "ok":
+        return jsonify({"done": False, "message": "Error updating item"}), 500
+
+    read_cache.delete(cache_key("item", type_item, uid))
+    if updated["prop"] is not None:
+        name_index.add(type_item, uid, SearchIndex.name_of(type_item, updated["prop"]))
+    version = updated["item"]["version"]
+    response = jsonify({"done": True, "message": "Item updated successfully", "version": version})
+    response.set_etag(item_etag(type_item, uid, version))
+    return response
 
 @app.route('/user', methods=['POST'])
 def add_user():
@@ -244,19 +727,92 @@ def add_favorite(type_item, uid):
     # Agregar a favoritos
     success, result = Favorites.add_favorites(user_id=user_id, item_id=item.id)
     if success:
+        read_cache.delete(cache_key("favorites", user_id))
         return jsonify(result), 201
     else:
         return jsonify({"error": "No se pudo agregar a favoritos"}), 400
     
 @app.route('/favorites/user/<int:user_id>', methods=['GET'])
 def get_user_favorites(user_id):
-    favorites = Favorites.get_favorites(user_id)
+    if request.args.get("expand") == "items":
+        # Cada favorito con el item completo, cargado en una sola consulta
+        favorites = []
+        for fav, item, prop in Favorites.get_favorites_with_items(user_id):
+            prop_map = get_prop_map(item["type_item"])
+            if prop is not None and prop_map is not None:
+                fav["item"] = {
+                    "type_item": item["type_item"],
+                    "result": build_result(item, prop, prop_map)
+                }
+            else:
+                fav["item"] = None
+            favorites.append(fav)
+        return jsonify(favorites), 200
+
+    key = cache_key("favorites", user_id)
+    favorites = cache_get(key)
+    if favorites is None:
+        favorites = Favorites.get_favorites(user_id)
+        cache_set(key, favorites)
     return jsonify(favorites), 200
 
+@app.route('/favorites/user/<int:user_id>/batch', methods=['POST'])
+def add_favorites_batch(user_id):
+    keys = parse_item_keys(request.get_json(silent=True))
+    if keys is None:
+        return jsonify({"error": "Se requiere una lista items con type_item y uid"}), 400
+
+    ok, item_ids = Item.resolve_ids(keys)
+    if not ok:
+        return jsonify({"error": "No se pudieron agregar los favoritos"}), 500
+    ok, added = Favorites.add_many(user_id, [item_ids[key] for key in keys if key in item_ids])
+    if not ok:
+        return jsonify({"error": "No se pudieron agregar los favoritos"}), 400
+    read_cache.delete(cache_key("favorites", user_id))
+
+    results, seen = [], set()
+    for type_item, uid in keys:
+        item_id = item_ids.get((type_item, uid))
+        if item_id is None:
+            results.append({"type_item": type_item, "uid": uid, "status": "not_found"})
+            continue
+        # Una clave repetida en la petición es un duplicado del primer resultado
+        status, favorite_id = added[item_id] if item_id not in seen else ("duplicate", None)
+        seen.add(item_id)
+        result = {"type_item": type_item, "uid": uid, "item_id": item_id, "status": status}
+        if favorite_id is not None:
+            result["id"] = favorite_id
+        results.append(result)
+    return jsonify({"results": results}), 200
+
+@app.route('/favorites/user/<int:user_id>/batch', methods=['DELETE'])
+def delete_favorites_batch(user_id):
+    keys = parse_item_keys(request.get_json(silent=True))
+    if keys is None:
+        return jsonify({"error": "Se requiere una lista items con type_item y uid"}), 400
+
+    ok, item_ids = Item.resolve_ids(keys)
+    if not ok:
+        return jsonify({"error": "No se pudieron eliminar los favoritos"}), 500
+    ok, removed = Favorites.remove_many(user_id, list(item_ids.values()))
+    if not ok:
+        return jsonify({"error": "No se pudieron eliminar los favoritos"}), 400
+    read_cache.delete(cache_key("favorites", user_id))
+
+    results = []
+    for type_item, uid in keys:
+        item_id = item_ids.get((type_item, uid))
+        status = "removed" if item_id in removed else "not_found"
+        results.append({"type_item": type_item, "uid": uid, "status": status})
+    return jsonify({"results": results}), 200
+
 @app.route('/favorites/<int:favorite_id>', methods=['DELETE'])
 def delete_favorite(favorite_id):
+    # El user_id se necesita para invalidar su lista de favoritos
+    favorite = db.session.get(Favorites, favorite_id)
     success = Favorites.delete_favorites(favorite_id)
     if success:
+        read_cache.delete(cache_key("favorites", favorite.user_id))
         return jsonify({"msg": "Favorito eliminado"}), 200
     else:
         return jsonify({"error": "No se pudo eliminar el favorito"}), 404
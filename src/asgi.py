@@ -0,0 +1,195 @@
+"""
+Modo ASGI: las lecturas más frecuentes (detalle, listado y búsqueda de items)
+se sirven con sesiones asíncronas de SQLAlchemy (aiosqlite en local, asyncpg
+en producción), así un proceso atiende muchas peticiones a la vez mientras
+espera a la base. El resto de endpoints se delega a la app Flask de app.py
+en un pool de hilos, con el mismo comportamiento que en el modo WSGI.
+
+    uvicorn asgi:application --app-dir src --port 3000
+"""
+import contextlib
+import os
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.http import parse_etags, quote_etag
+from app import (app, read_cache, item_etag, get_prop_map, parse_list_args, list_page,
+                 parse_search_args, search_page, reads_from_replica, replica_fills_cache)
+from cache import cache_key
+from models import Item, ItemDocument, SearchIndex, build_result
+from pool import async_engine_options
+from serializers import dumps
+from utils import APIException
+
+# Driver asíncrono para cada backend de DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_url(url):
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver for {url.get_backend_name()}")
+    return url.set(drivername=driver)
+
+
+def create_sessions():
+    # Una fábrica de sesiones por base: el primario y, si hay, la réplica
+    options = async_engine_options(app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+    urls = {None: app.config['SQLALCHEMY_DATABASE_URI']}
+    replica = app.config.get('SQLALCHEMY_BINDS', {}).get("replica")
+    if replica is not None:
+        urls["replica"] = replica["url"]
+    return {key: async_sessionmaker(create_async_engine(async_url(url), **options), expire_on_commit=False)
+            for key, url in urls.items()}
+
+
+sessions = create_sessions()
+
+
+def route_read(request):
+    # Mismo criterio que route_reads en app.py: (usa la réplica, forzada al primario)
+    if "replica" not in sessions:
+        return False, False
+    use_replica = reads_from_replica(request.cookies, request.headers)
+    return use_replica, not use_replica
+
+
+def session_for(request):
+    use_replica, _ = route_read(request)
+    return sessions["replica" if use_replica else None]()
+
+
+async def cache_call(method, *args):
+    # La caché compartida (SQLite) lee y escribe en disco: se usa desde el
+    # pool de hilos para no bloquear el bucle de eventos
+    if read_cache.name == "shared":
+        return await run_in_threadpool(method, *args)
+    return method(*args)
+
+
+def json_response(payload, status_code=200, etag=None):
+    headers = {"ETag": quote_etag(etag)} if etag is not None else None
+    return Response(dumps(payload) + b"\n", status_code, headers, media_type=app.json.mimetype)
+
+
+async def get_item(request):
+    type_item, uid = request.path_params["type_item"], request.path_params["uid"]
+    use_replica, read_primary = route_read(request)
+    async with sessions["replica" if use_replica else None]() as session:
+        try:
+            # Petición condicional: solo se consulta Item.version
+            if_none_match = request.headers.get("if-none-match")
+            if if_none_match:
+                version = await session.scalar(Item.version_statement(type_item, uid))
+                if version is not None:
+                    etag = item_etag(type_item, uid, version)
+                    if parse_etags(if_none_match).contains_weak(etag):
+                        return Response(status_code=304, headers={"ETag": quote_etag(etag)})
+
+            # Como en cache_get/cache_set de app.py: quien pidió el primario no lee
+            # de la caché y lo leído de la réplica solo se guarda si replica_fills_cache()
+            cached = None if read_primary else await cache_call(read_cache.get, cache_key("item", type_item, uid))
+            if cached is not None:
+                return json_response(cached, etag=item_etag(type_item, uid, cached["result"]["__v"]))
+
+            if app.config['ITEM_DOCUMENTS']:
+                document = (await session.execute(ItemDocument.get_statement(type_item, uid))).first()
+                if document is not None:
+                    return Response(document.body, headers={"ETag": quote_etag(item_etag(type_item, uid, document.version))},
+                                    media_type=app.json.mimetype)
+
+            row = (await session.execute(Item.detail_statement(type_item, uid))).first()
+        except SQLAlchemyError:
+            row = None
+    if row is None:
+        return json_response({"done": False, "message": "Item not found"}, 404)
+    item, prop = row
+    if prop is None:
+        return json_response({"done": False, "message": "Properties not found"}, 404)
+    prop_map = get_prop_map(type_item)
+    if prop_map is None:
+        return json_response({"done": False, "message": "Invalid type_item"}, 400)
+
+    response = {"result": build_result(item.serialize(), prop.serialize(), prop_map)}
+    if not use_replica or replica_fills_cache():
+        await cache_call(read_cache.set, cache_key("item", type_item, uid), response)
+    return json_response(response, etag=item_etag(type_item, uid, item.version))
+
+
+async def list_items(request):
+    type_item = request.path_params["type_item"]
+    query = parse_list_args(type_item, request.query_params)
+    limit = query["limit"] + 1
+    stmts = Item.list_statements(type_item, limit, query["columns"],
+                                 query["filters"], query["sort"], query["after"])
+    async with session_for(request) as session:
+        if request.query_params.get("explain") == "1" and app.config['QUERY_PLAN_DEBUG']:
+            plan = await session.run_sync(lambda sync_session: [Item.explain(stmt, sync_session) for stmt in stmts])
+            return json_response(plan)
+        try:
+            # Segmentos en orden hasta completar la página, como list_with_properties
+            rows = []
+            for stmt in stmts:
+                rows += (await session.execute(stmt)).all()
+                if len(rows) >= limit:
+                    break
+        except SQLAlchemyError:
+            return json_response({"done": False, "message": "Error listing items"}, 500)
+    return Response(list_page(rows[:limit], query), media_type=app.json.mimetype)
+
+
+async def search_items(request):
+    query, type_item, limit, offset = parse_search_args(request.query_params)
+    async with session_for(request) as session:
+        try:
+            dialect = session.bind.dialect.name
+            stmt = SearchIndex.search_statement(dialect, query, type_item, limit + 1, offset,
+                                                app.config['SEARCH_CANDIDATES'])
+            rows = [] if stmt is None else (await session.execute(stmt)).mappings().all()
+        except SQLAlchemyError:
+            return json_response({"done": False, "message": "Search failed"}, 500)
+    return json_response(search_page(rows, limit, offset))
+
+
+async def handle_invalid_usage(request, error):
+    return json_response(error.to_dict(), error.status_code)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(application):
+    # La tabla de búsqueda la crea la app Flask antes de cada petición;
+    # aquí se asegura antes de la primera lectura asíncrona
+    with app.app_context():
+        SearchIndex.ensure()
+    yield
+    for factory in sessions.values():
+        await factory.kw["bind"].dispose()
+
+
+# Las rutas asíncronas no pasan por Flask ni por CORS(app): mismas cabeceras
+# que flask_cors por defecto (devuelve el Origin recibido, con Vary: Origin),
+# también en errores y 304. Las peticiones OPTIONS siguen llegando a Flask.
+CORS = [Middleware(CORSMiddleware, allow_origin_regex=".*", allow_methods=["*"], allow_headers=["*"])]
+
+application = Starlette(
+    routes=[
+        Route("/items/{type_item}/{uid}", get_item, methods=["GET"], middleware=CORS),
+        Route("/items/{type_item}", list_items, methods=["GET"], middleware=CORS),
+        Route("/search", search_items, methods=["GET"], middleware=CORS),
+        # Escrituras y el resto de lecturas: la app Flask, en un pool de hilos
+        Mount("/", app=WSGIMiddleware(app, workers=int(os.getenv("ASGI_WSGI_THREADS", 10)))),
+    ],
+    exception_handlers={APIException: handle_invalid_usage},
+    lifespan=lifespan,
+)
@@ -0,0 +1,78 @@
+"""
+Índice en memoria para autocompletar nombres de items por prefijo
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from heapq import merge
+from itertools import islice
+
+
+class PrefixIndex:
+    # Por cada tipo, una lista ordenada de (nombre en minúsculas, uid, nombre).
+    # Buscar un prefijo es un bisect más recorrer los N siguientes.
+
+    def __init__(self):
+        self._entries = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+        self.built_at = None
+
+    def build(self, rows):
+        # rows: iterable de (type_item, uid, name)
+        entries, keys = {}, {}
+        for type_item, uid, name in rows:
+            if not name:
+                continue
+            entry = (name.casefold(), str(uid), name)
+            entries.setdefault(type_item, []).append(entry)
+            keys[(type_item, str(uid))] = entry
+        for values in entries.values():
+            values.sort()
+        with self._lock:
+            self._entries, self._keys = entries, keys
+            self.built_at = time.monotonic()
+
+    def add(self, type_item, uid, name):
+        with self._lock:
+            self._remove((type_item, str(uid)))
+            if not name:
+                return
+            entry = (name.casefold(), str(uid), name)
+            insort(self._entries.setdefault(type_item, []), entry)
+            self._keys[(type_item, str(uid))] = entry
+
+    def remove(self, type_item, uid):
+        with self._lock:
+            self._remove((type_item, str(uid)))
+
+    def _remove(self, key):
+        entry = self._keys.pop(key, None)
+        if entry is None:
+            return
+        values = self._entries.get(key[0], [])
+        index = bisect_left(values, entry)
+        if index < len(values) and values[index] == entry:
+            del values[index]
+
+    def complete(self, prefix, type_item=None, limit=10):
+        # Hasta limit coincidencias en orden alfabético: [(type_item, uid, name)]
+        prefix = prefix.casefold()
+        with self._lock:
+            if type_item is not None:
+                types = [type_item] if type_item in self._entries else []
+            else:
+                types = sorted(self._entries)
+            matches = [self._matches(type_name, prefix, limit) for type_name in types]
+        return [(type_name, uid, name)
+                for _, uid, name, type_name in islice(merge(*matches), limit)]
+
+    def _matches(self, type_item, prefix, limit):
+        values = self._entries[type_item]
+        result = []
+        index = bisect_left(values, (prefix,))
+        while index < len(values) and len(result) < limit and values[index][0].startswith(prefix):
+            folded, uid, name = values[index]
+            result.append((folded, uid, name, type_item))
+            index += 1
+        return result
@@ -0,0 +1,263 @@
+"""
+Cachés para las respuestas de lectura (items y favoritos).
+
+Todas las implementaciones comparten la misma interfaz (get, set, delete,
+clear, stats) y se eligen con make_cache según la variable CACHE_BACKEND:
+
+- "memory": LRU en memoria, propia de cada proceso.
+- "shared": archivo SQLite local compartido por todos los workers de gunicorn
+  de la misma máquina; una invalidación en un worker se ve en todos.
+- "none": sin caché.
+
+delete() deja además una marca (tombstone) durante tombstone_ttl segundos en
+la que set() no guarda nada para esa clave. Así una lectura que cargó la fila
+antes de una escritura no puede volver a guardar la versión anterior después
+de que la escritura invalidara la clave.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def cache_key(*parts):
+    # Las claves son cadenas para que sirvan en cualquier backend
+    return ":".join(str(part) for part in parts)
+
+
+class CacheBackend:
+    name = "base"
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def delete(self, *keys):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def size(self):
+        return 0
+
+    def stats(self):
+        return {
+            "backend": self.name,
+            "size": self.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+class NullCache(CacheBackend):
+    name = "none"
+
+    def get(self, key):
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUCache(CacheBackend):
+    # Caché acotada por número de entradas (LRU) y con expiración (TTL)
+    name = "memory"
+
+    def __init__(self, maxsize=1024, ttl=300, tombstone_ttl=10):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.tombstone_ttl = tombstone_ttl
+        self._data = OrderedDict()
+        # clave -> instante hasta el que set() se ignora
+        self._tombstones = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if self._tombstones.get(key, 0) > time.monotonic():
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            now = time.monotonic()
+            if len(self._tombstones) > self.maxsize:
+                self._tombstones = {key: until for key, until in self._tombstones.items() if until > now}
+            for key in keys:
+                self._data.pop(key, None)
+                if self.tombstone_ttl > 0:
+                    self._tombstones[key] = now + self.tombstone_ttl
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._tombstones.clear()
+
+    def size(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return {**super().stats(), "maxsize": self.maxsize, "ttl": self.ttl,
+                    "tombstone_ttl": self.tombstone_ttl}
+
+
+class SQLiteCache(CacheBackend):
+    # Caché compartida entre procesos sobre un archivo SQLite local (modo WAL).
+    # Los valores se guardan como JSON; los contadores son de cada proceso.
+    name = "shared"
+
+    # Cada cuántas escrituras se purgan las entradas vencidas o sobrantes
+    PRUNE_EVERY = 100
+
+    def __init__(self, path, maxsize=10000, ttl=300, tombstone_ttl=10):
+        super().__init__()
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.tombstone_ttl = tombstone_ttl
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_expires ON cache (expires)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS tombstone (key TEXT PRIMARY KEY, expires REAL NOT NULL)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        # Una conexión por hilo y por proceso (gunicorn hace fork tras importar)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        try:
+            row = self._conn().execute(
+                "SELECT value FROM cache WHERE key = ? AND expires >= ?",
+                (key, time.time())).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        try:
+            conn = self._conn()
+            now = time.time()
+            # No se guarda si otra escritura invalidó la clave hace menos de tombstone_ttl
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires) SELECT ?, ?, ? "
+                "WHERE NOT EXISTS (SELECT 1 FROM tombstone WHERE key = ? AND expires >= ?)",
+                (key, json.dumps(value), now + self.ttl, key, now))
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(conn)
+        except sqlite3.Error:
+            pass
+
+    def _prune(self, conn):
+        conn.execute("DELETE FROM tombstone WHERE expires < ?", (time.time(),))
+        removed = conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),)).rowcount
+        # Si aún sobran entradas se descartan las que vencen antes
+        removed += conn.execute(
+            "DELETE FROM cache WHERE key IN ("
+            "SELECT key FROM cache ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,)).rowcount
+        self.evictions += removed
+
+    def delete(self, *keys):
+        if not keys:
+            return
+        conn = self._conn()
+        try:
+            # Borrado y marca en la misma transacción
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("DELETE FROM cache WHERE key = ?", [(key,) for key in keys])
+            if self.tombstone_ttl > 0:
+                expires = time.time() + self.tombstone_ttl
+                conn.executemany("INSERT OR REPLACE INTO tombstone (key, expires) VALUES (?, ?)",
+                                 [(key, expires) for key in keys])
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+
+    def clear(self):
+        try:
+            self._conn().execute("DELETE FROM cache")
+            self._conn().execute("DELETE FROM tombstone")
+        except sqlite3.Error:
+            pass
+
+    def size(self):
+        try:
+            return self._conn().execute("SELECT count(*) FROM cache").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def stats(self):
+        return {**super().stats(), "maxsize": self.maxsize, "ttl": self.ttl,
+                "tombstone_ttl": self.tombstone_ttl, "path": self.path}
+
+
+def make_cache(backend="memory", maxsize=1024, ttl=300, path=None, tombstone_ttl=10):
+    if backend == "none":
+        return NullCache()
+    if backend == "shared":
+        return SQLiteCache(path or "/tmp/starwars-cache.sqlite3", maxsize=maxsize, ttl=ttl,
+                           tombstone_ttl=tombstone_ttl)
+    if backend == "memory":
+        return LRUCache(maxsize=maxsize, ttl=ttl, tombstone_ttl=tombstone_ttl)
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -1,7 +1,13 @@
+import math
+import re
+from functools import cache
+from itertools import islice
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import String, Boolean, ForeignKey, Date, Time, DateTime, Integer, Numeric
-from sqlalchemy.orm import Mapped, mapped_column, relationship, DeclarativeBase
-from eralchemy2 import render_er
+from flask_sqlalchemy.session import Session
+from sqlalchemy import String, Text, Boolean, ForeignKey, Date, Time, DateTime, Integer, Numeric, Float, Index, UniqueConstraint, insert, select, update, delete, tuple_, func, literal, and_, or_, text, bindparam
+from sqlalchemy.orm import Mapped, mapped_column, relationship, DeclarativeBase, aliased
+from serializers import dumps
 from sqlalchemy.exc import SQLAlchemyError
 
 
@@ -9,7 +15,93 @@ class Base(DeclarativeBase):
     pass
 
 
-db = SQLAlchemy(model_class=Base)
+class RoutingSession(Session):
+    # Envía las consultas a la réplica (bind "replica") cuando la petición lo
+    # indica con g.use_replica; los flush y las sentencias DML siempre van al primario
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_app_context() and g.get("use_replica")
+                and not getattr(clause, "is_dml", False) and "replica" in self._db.engines):
+            return self._db.engines["replica"]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
+
+# Columnas de Properties que se pueden cargar o modificar desde la API
+PROPERTIE_COLUMNS = (
+    "created", "edited",
+    "propertie_1", "propertie_2", "propertie_3", "propertie_4", "propertie_5",
+    "propertie_6", "propertie_7", "propertie_8", "propertie_9",
+    "url",
+)
+
+# Mapeos de claves para properties según el tipo de item
+PEOPLE_PROPERTIES = [
+    ("propertie_1", "name"),
+    ("propertie_2", "gender"),
+    ("propertie_3", "skin_color"),
+    ("propertie_4", "hair_color"),
+    ("propertie_5", "height"),
+    ("propertie_6", "eye_color"),
+    ("propertie_7", "mass"),
+    ("propertie_8", "homeworld"),
+    ("propertie_9", "birth_year"),
+]
+
+PLANETS_PROPERTIES = [
+    ("propertie_1", "climate"),
+    ("propertie_2", "surface_water"),
+    ("propertie_3", "name"),
+    ("propertie_4", "diameter"),
+    ("propertie_5", "rotation_period"),
+    ("propertie_6", "terrain"),
+    ("propertie_7", "gravity"),
+    ("propertie_8", "orbital_period"),
+    ("propertie_9", "population"),
+]
+
+# Operadores de filtro admitidos en los listados de items
+ATTRIBUTE_OPERATORS = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+    "prefix": lambda column, value: column.startswith(value, autoescape=True),
+}
+
+PROPERTY_MAPS = {
+    "people": PEOPLE_PROPERTIES,
+    "planets": PLANETS_PROPERTIES,
+}
+
+# Claves de properties que no dependen del tipo de item
+COMMON_PROPERTIES = ("created", "edited", "url")
+
+def build_result(item, prop, prop_map, fields=None):
+    # Construir el dict de properties con los nombres correctos;
+    # fields limita las properties devueltas (proyección)
+    properties = {}
+    for key in COMMON_PROPERTIES:
+        if fields is None or key in fields:
+            properties[key] = prop[key]
+    for db_key, api_key in prop_map:
+        if fields is None or api_key in fields:
+            properties[api_key] = prop[db_key]
+
+    return {
+        "properties": properties,
+        "description": item["description"],
+        "uid": item["uid"],
+        "__v": item["version"]
+    }
+
+# Properties con valor numérico: se guardan también en ItemAttribute.num_value
+NUMERIC_PROPERTIES = {
+    "height", "mass",
+    "surface_water", "diameter", "rotation_period", "orbital_period", "population",
+}
 
 
 class User(Base):
@@ -76,12 +168,19 @@ class User(Base):
             return False
 
 
+# Máximo de favoritos por usuario
+MAX_FAVORITES = 5
+
+
 class Favorites(Base):
     __tablename__ = "favorites"
+    __table_args__ = (
+        UniqueConstraint("user_id", "item_id", name="uq_favorites_user_id_item_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey('user.id'), nullable=False)
+        Integer, ForeignKey('user.id'), nullable=False, index=True)
     item_id: Mapped[int] = mapped_column(
         Integer, ForeignKey('item.id'), nullable=False)
 
@@ -94,25 +193,83 @@ class Favorites(Base):
     
     @staticmethod
     def add_favorites(user_id: int, item_id: int):
+        # Un solo INSERT ... SELECT que solo inserta si el usuario tiene menos
+        # de MAX_FAVORITES; los duplicados los rechaza la restricción única
         try:
-            # Contar cuántos favoritos tiene este usuario
-            count = db.session.query(Favorites).filter_by(user_id=user_id).count()
-            if count >= 5:
+            Favorites._lock_user(user_id)
+            current = (select(func.count()).select_from(Favorites)
+                       .where(Favorites.user_id == user_id).scalar_subquery())
+            favorite_id = db.session.execute(
+                insert(Favorites)
+                .from_select(
+                    ["user_id", "item_id"],
+                    select(literal(user_id, Integer), literal(item_id, Integer))
+                    .where(current < MAX_FAVORITES))
+                .returning(Favorites.id)
+            ).scalar()
+            if favorite_id is None:
+                db.session.rollback()
                 return False, None
-            # Verificar si ya existe este favorito para evitar duplicados
-            exists = db.session.query(Favorites).filter_by(user_id=user_id, item_id=item_id).first()
-            if exists:
-                return False, None
-            favorite = Favorites(
-                user_id=user_id,
-                item_id=item_id
-            )
-            db.session.add(favorite)
             db.session.commit()
-            return True, favorite.serialize()
+            return True, {"id": favorite_id, "user_id": user_id, "item_id": item_id}
         except SQLAlchemyError:
             db.session.rollback()
             return False, None
+
+    @staticmethod
+    def add_many(user_id: int, item_ids: list):
+        # Agrega varios favoritos en una transacción respetando MAX_FAVORITES.
+        # Devuelve {item_id: ("added", id) | ("duplicate", None) | ("limit", None)}
+        try:
+            Favorites._lock_user(user_id)
+            existing = set(db.session.scalars(
+                select(Favorites.item_id).where(Favorites.user_id == user_id)))
+            slots = MAX_FAVORITES - len(existing)
+            results, rows, seen = {}, [], set()
+            for item_id in item_ids:
+                if item_id in seen:
+                    continue
+                seen.add(item_id)
+                if item_id in existing:
+                    results[item_id] = ("duplicate", None)
+                elif len(rows) < slots:
+                    rows.append({"user_id": user_id, "item_id": item_id})
+                else:
+                    results[item_id] = ("limit", None)
+            if rows:
+                inserted = db.session.execute(
+                    insert(Favorites).returning(Favorites.id, Favorites.item_id), rows)
+                for favorite_id, item_id in inserted:
+                    results[item_id] = ("added", favorite_id)
+            db.session.commit()
+            return True, results
+        except SQLAlchemyError:
+            db.session.rollback()
+            return False, {}
+
+    @staticmethod
+    def remove_many(user_id: int, item_ids: list):
+        # Elimina varios favoritos del usuario con un solo DELETE;
+        # devuelve el conjunto de item_id eliminados
+        try:
+            removed = set(db.session.scalars(
+                delete(Favorites)
+                .where(Favorites.user_id == user_id, Favorites.item_id.in_(item_ids))
+                .returning(Favorites.item_id)))
+            db.session.commit()
+            return True, removed
+        except SQLAlchemyError:
+            db.session.rollback()
+            return False, set()
+
+    @staticmethod
+    def _lock_user(user_id: int):
+        # En SQLite las escrituras ya están serializadas. En motores con
+        # READ COMMITTED (PostgreSQL) se bloquea la fila del usuario para que
+        # dos inserciones concurrentes no superen juntas el límite.
+        if db.session.get_bind().dialect.name == "sqlite":
+            return
+        db.session.execute(select(User.id).where(User.id == user_id).with_for_update())
             
     @staticmethod
     def get_favorites(user_id: int):
@@ -123,6 +280,24 @@ class Favorites(Base):
             db.session.rollback()
             return []
 
+    @staticmethod
+    def get_favorites_with_items(user_id: int):
+        # Favoritos con su Item y Properties en una sola consulta
+        # (favorites.item_id -> item.id -> properties.propertie_id)
+        try:
+            rows = db.session.execute(
+                select(Favorites, Item, Properties)
+                .join(Item, Item.id == Favorites.item_id)
+                .outerjoin(Properties, Properties.propertie_id == Item.prop_id)
+                .where(Favorites.user_id == user_id)
+                .order_by(Favorites.id)
+            ).all()
+            return [(fav.serialize(), item.serialize(), prop.serialize() if prop else None)
+                    for fav, item, prop in rows]
+        except SQLAlchemyError:
+            db.session.rollback()
+            return []
+
     @staticmethod
     def delete_favorites(item_id: int):
         try:
@@ -139,6 +314,12 @@ class Favorites(Base):
 # type_item define el tipo de elemento, que puede ser "People" o "Planets"
 class Item(Base):
     __tablename__ = "item"
+    __table_args__ = (
+        # Búsqueda por (type_item, uid) en GET/PUT/DELETE /items/<type_item>/<uid>
+        Index("ix_item_type_item_uid", "type_item", "uid"),
+        # Paginación por cursor de GET /items/<type_item> (WHERE type_item = ? AND id > ?)
+        Index("ix_item_type_item_id", "type_item", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     type_item: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -175,6 +356,93 @@ class Item(Base):
             db.session.rollback()
             return False, {"error": str(e)}
         
+    @staticmethod
+    def ingest_rows(data: dict):
+        # Convierte un item de entrada (formato de create_object.adapt_result)
+        # en las filas de Item y Properties; devuelve None si no es válido
+        if not isinstance(data, dict) or not data.get("prop_id") or not data.get("type_item"):
+            return None
+        prop = data.get("properties") or {}
+        if not isinstance(prop, dict):
+            return None
+        if prop.get("propertie_id", data["prop_id"]) != data["prop_id"]:
+            return None
+        item_row = {
+            "type_item": data["type_item"],
+            "prop_id": data["prop_id"],
+            "description": data.get("description", ""),
+            "uid": data.get("uid", ""),
+            "version": data.get("version", 1)
+        }
+        prop_row = {"propertie_id": data["prop_id"]}
+        for column in PROPERTIE_COLUMNS:
+            prop_row[column] = prop.get(column, "")
+        return item_row, prop_row
+
+    @staticmethod
+    def bulk_load(items, batch_size: int = 500, on_insert=None):
+        # Carga items por lotes: una consulta para detectar los prop_id ya
+        # existentes, un INSERT multi-fila por tabla y un solo commit por lote.
+        # on_insert recibe los pares (item, properties) insertados tras cada commit.
+        # "rejected" cuenta los items inválidos y "failed" los del lote en el que
+        # falló la base; tras un fallo no se procesan más lotes.
+        report = {"inserted": 0, "skipped": 0, "rejected": 0, "failed": 0}
+        iterator = iter(items)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            inserted = Item._load_batch(batch, report)
+            if inserted is None:
+                break
+            if inserted and on_insert is not None:
+                on_insert(inserted)
+        return report
+
+    @staticmethod
+    def _load_batch(batch: list, report: dict):
+        rows = []
+        for data in batch:
+            row = Item.ingest_rows(data)
+            if row is None:
+                report["rejected"] += 1
+            else:
+                rows.append(row)
+        if not rows:
+            return []
+        item_rows, prop_rows = [], []
+        try:
+            prop_ids = {item_row["prop_id"] for item_row, _ in rows}
+            existing = set(db.session.scalars(
+                select(Item.prop_id).where(Item.prop_id.in_(prop_ids))))
+            for item_row, prop_row in rows:
+                # Los duplicados dentro del mismo lote también se omiten
+                if item_row["prop_id"] in existing:
+                    report["skipped"] += 1
+                    continue
+                existing.add(item_row["prop_id"])
+                item_rows.append(item_row)
+                prop_rows.append(prop_row)
+            if item_rows:
+                db.session.execute(insert(Item), item_rows)
+                db.session.execute(insert(Properties), prop_rows)
+                attribute_rows = []
+                for item_row, prop_row in zip(item_rows, prop_rows):
+                    attribute_rows.extend(ItemAttribute.rows_for(
+                        item_row["type_item"], item_row["prop_id"], prop_row))
+                if attribute_rows:
+                    db.session.execute(insert(ItemAttribute), attribute_rows)
+                SearchIndex.replace([SearchIndex.row_for(item_row, prop_row)
+                                     for item_row, prop_row in zip(item_rows, prop_rows)])
+                ItemDocument.replace(zip(item_rows, prop_rows))
+            db.session.commit()
+            report["inserted"] += len(item_rows)
+            return list(zip(item_rows, prop_rows))
+        except SQLAlchemyError:
+            db.session.rollback()
+            report["failed"] += len(item_rows) if item_rows else len(rows)
+            return None
+
     @staticmethod
     def get_item(type_item, uid):
         try:
@@ -187,6 +455,382 @@ class Item(Base):
             db.session.rollback()
             return False, None
     
+    @staticmethod
+    def version_statement(type_item, uid):
+        return select(Item.version).where(Item.type_item == type_item, Item.uid == uid).limit(1)
+
+    @staticmethod
+    def get_version(type_item, uid):
+        # Solo la columna version, para validar ETags sin cargar el item completo
+        try:
+            return True, db.session.scalar(Item.version_statement(type_item, uid))
+        except SQLAlchemyError:
+            db.session.rollback()
+            return False, None
+
+    @staticmethod
+    def update_with_properties(type_item, uid, values: dict, prop_values: dict, expected_version=None,
+                               check_properties=True):
+        # Actualiza Item (incrementando version) y Properties en una sola
+        # transacción con UPDATE ... WHERE, sin cargar las filas antes.
+        # Con expected_version el UPDATE solo aplica si la versión coincide.
+        # Si no hay prop_values y check_properties es False, Properties no se
+        # consulta y "prop" es None.
+        # Devuelve (estado, datos): "ok" con {"item", "prop"}, "not_found",
+        # "conflict", "properties_not_found" o "error".
+        try:
+            stmt = update(Item).where(Item.type_item == type_item, Item.uid == uid)
+            if expected_version is not None:
+                stmt = stmt.where(Item.version == expected_version)
+            item = db.session.execute(
+                stmt.values(version=Item.version + 1, **values)
+                .returning(*Item.__table__.c)
+                .execution_options(synchronize_session=False)
+            ).mappings().first()
+            if item is None:
+                db.session.rollback()
+                ok, version = Item.get_version(type_item, uid)
+                if ok and version is not None and expected_version is not None:
+                    return "conflict", None
+                return "not_found", None
+
+            if prop_values:
+                prop = db.session.execute(
+                    update(Properties)
+                    .where(Properties.propertie_id == item["prop_id"])
+                    .values(**prop_values)
+                    .returning(*Properties.__table__.c)
+                    .execution_options(synchronize_session=False)
+                ).mappings().first()
+            elif check_properties:
+                prop = db.session.execute(
+                    select(*Properties.__table__.c).where(Properties.propertie_id == item["prop_id"])
+                ).mappings().first()
+            else:
+                prop = {}
+            if prop is None:
+                # Sin properties no se aplica nada, tampoco el cambio de versión
+                db.session.rollback()
+                return "properties_not_found", None
+
+            item, prop = dict(item), dict(prop) or None
+            changed = {api_key for db_key, api_key in PROPERTY_MAPS.get(type_item.lower(), [])
+                       if db_key in prop_values}
+            if changed:
+                ItemAttribute.replace_for(type_item, item["prop_id"], prop, names=changed)
+            if prop is not None:
+                SearchIndex.replace([SearchIndex.row_for(item, prop)])
+            elif "description" in values:
+                SearchIndex.update_description(item["prop_id"], item["description"])
+            if prop is not None:
+                ItemDocument.replace([(item, prop)])
+            else:
+                ItemDocument.refresh([item["prop_id"]])
+            db.session.commit()
+            return "ok", {"item": item, "prop": prop}
+        except SQLAlchemyError:
+            db.session.rollback()
+            return "error", None
+
+    @staticmethod
+    def bulk_delete(keys, chunk_size: int = 500):
+        # Elimina items por (type_item, uid) en transacciones por lote, con
+        # DELETE ... IN sobre favorites, item_attribute, item_search,
+        # item_document, properties e item. Devuelve (ok, {"deleted": [claves], "user_ids": {...}}).
+        deleted, user_ids = [], set()
+        keys = list(dict.fromkeys(keys))
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            try:
+                rows = db.session.execute(
+                    select(Item.id, Item.prop_id, Item.type_item, Item.uid)
+                    .where(tuple_(Item.type_item, Item.uid).in_(chunk))
+                ).all()
+                if not rows:
+                    continue
+                ids = [row.id for row in rows]
+                prop_ids = [row.prop_id for row in rows]
+                user_ids.update(db.session.scalars(
+                    delete(Favorites).where(Favorites.item_id.in_(ids)).returning(Favorites.user_id)))
+                ItemAttribute.delete_for(prop_ids)
+                SearchIndex.remove(prop_ids)
+                ItemDocument.remove(prop_ids)
+                db.session.execute(delete(Properties).where(Properties.propertie_id.in_(prop_ids)))
+                db.session.execute(delete(Item).where(Item.id.in_(ids)))
+                db.session.commit()
+                deleted.extend((row.type_item, row.uid) for row in rows)
+            except SQLAlchemyError:
+                db.session.rollback()
+                return False, {"deleted": deleted, "user_ids": user_ids}
+        return True, {"deleted": deleted, "user_ids": user_ids}
+
+    @staticmethod
+    def bulk_patch(patches, chunk_size: int = 500):
+        # Actualización parcial de varios items en transacciones por lote.
+        # patches: [{"key": (type_item, uid), "values": {...}, "prop_values": {...},
+        #            "expected_version": int | None}], sin claves repetidas
+        # Por lote: una consulta (con bloqueo) para ids y versiones, UPDATE por
+        # clave primaria en bloque para item y properties, y el mismo tratamiento
+        # en bloque para atributos, índice de búsqueda y documentos.
+        # Devuelve (ok, {clave: ("updated", version) | ("conflict", version) | ("not_found", None)})
+        results = {}
+        for start in range(0, len(patches), chunk_size):
+            chunk = patches[start:start + chunk_size]
+            try:
+                rows = db.session.execute(
+                    select(Item.id, Item.prop_id, Item.type_item, Item.uid, Item.version,
+                           Properties.id.label("properties_id"))
+                    .outerjoin(Properties, Properties.propertie_id == Item.prop_id)
+                    .where(tuple_(Item.type_item, Item.uid).in_([patch["key"] for patch in chunk]))
+                    .with_for_update(of=Item)
+                ).all()
+                current = {(row.type_item, row.uid): row for row in rows}
+                item_rows, prop_rows, attribute_rows, attribute_keys = [], [], [], []
+                search_names, search_descriptions, updated_prop_ids = [], [], []
+                for patch in chunk:
+                    key = patch["key"]
+                    row = current.get(key)
+                    if row is None or (patch["prop_values"] and row.properties_id is None):
+                        results[key] = ("not_found", None)
+                        continue
+                    expected = patch.get("expected_version")
+                    if expected is not None and expected != row.version:
+                        results[key] = ("conflict", row.version)
+                        continue
+                    version = row.version + 1
+                    item_rows.append({"id": row.id, "version": version, **patch["values"]})
+                    if patch["prop_values"]:
+                        prop_rows.append({"id": row.properties_id, **patch["prop_values"]})
+                        names = {api_key for db_key, api_key in PROPERTY_MAPS.get(row.type_item.lower(), [])
+                                 if db_key in patch["prop_values"]}
+                        attribute_keys.extend((row.prop_id, name) for name in names)
+                        attribute_rows.extend(ItemAttribute.rows_for(
+                            row.type_item, row.prop_id, patch["prop_values"], names))
+                        name = SearchIndex.name_of(row.type_item, patch["prop_values"])
+                        if name:
+                            search_names.append({"prop_id": row.prop_id, "value": name})
+                    if "description" in patch["values"]:
+                        search_descriptions.append(
+                            {"prop_id": row.prop_id, "value": patch["values"]["description"] or ""})
+                    results[key] = ("updated", version)
+                    updated_prop_ids.append(row.prop_id)
+                if item_rows:
+                    db.session.execute(update(Item), item_rows)
+                if prop_rows:
+                    db.session.execute(update(Properties), prop_rows)
+                if attribute_keys:
+                    db.session.execute(delete(ItemAttribute).where(
+                        tuple_(ItemAttribute.prop_id, ItemAttribute.name).in_(attribute_keys)))
+                if attribute_rows:
+                    db.session.execute(insert(ItemAttribute), attribute_rows)
+                SearchIndex.update_column("name", search_names)
+                SearchIndex.update_column("description", search_descriptions)
+                ItemDocument.refresh(updated_prop_ids)
+                db.session.commit()
+            except SQLAlchemyError:
+                db.session.rollback()
+                for patch in chunk:
+                    results.pop(patch["key"], None)
+                return False, results
+        return True, results
+
+    @staticmethod
+    def detail_statement(type_item, uid):
+        # Item y sus properties en una sola consulta (LEFT JOIN por prop_id)
+        return (
+            select(Item, Properties)
+            .outerjoin(Properties, Properties.propertie_id == Item.prop_id)
+            .where(Item.type_item == type_item, Item.uid == uid)
+            .limit(1)
+        )
+
+    @staticmethod
+    def get_item_with_properties(type_item, uid):
+        try:
+            row = db.session.execute(Item.detail_statement(type_item, uid)).first()
+            if row is None:
+                return False, None
+            item, prop = row
+            return True, (item.serialize(), prop.serialize() if prop else None)
+        except SQLAlchemyError:
+            db.session.rollback()
+            return False, None
+
+    @staticmethod
+    def resolve_ids(keys):
+        # {(type_item, uid): id} para varias claves con una sola consulta
+        if not keys:
+            return True, {}
+        try:
+            rows = db.session.execute(
+                select(Item.type_item, Item.uid, Item.id)
+                .where(tuple_(Item.type_item, Item.uid).in_(list(keys)))
+            ).all()
+            return True, {(type_item, uid): item_id for type_item, uid, item_id in rows}
+        except SQLAlchemyError:
+            db.session.rollback()
+            return False, {}
+
+    @staticmethod
+    def list_names():
+        # (type_item, uid, name) de todos los items, para el autocompletado
+        try:
+            rows = db.session.execute(
+                select(Item.prop_id, Item.type_item, Item.uid, Item.description,
+                       Properties.propertie_1, Properties.propertie_3)
+                .join(Properties, Properties.propertie_id == Item.prop_id)
+            ).mappings().all()
+            return True, [(row["type_item"], row["uid"], SearchIndex.name_of(row["type_item"], row))
+                          for row in rows]
+        except SQLAlchemyError:
+            db.session.rollback()
+            return False, []
+
+    @staticmethod
+    def get_items_with_properties(keys):
+        # Varios items y sus properties en una sola consulta:
+        # (type_item, uid) IN (...) con LEFT JOIN a properties.
+        # Devuelve un dict {(type_item, uid): (item, prop)}.
+        if not keys:
+            return True, {}
+        try:
+            rows = db.session.execute(
+                select(Item, Properties)
+                .outerjoin(Properties, Properties.propertie_id == Item.prop_id)
+                .where(tuple_(Item.type_item, Item.uid).in_(list(keys)))
+            ).all()
+            found = {}
+            for item, prop in rows:
+                found.setdefault((item.type_item, item.uid),
+                                 (item.serialize(), prop.serialize() if prop else None))
+            return True, found
+        except SQLAlchemyError:
+            db.session.rollback()
+            return False, {}
+
+    @staticmethod
+    def list_statements(type_item, limit=20, columns=PROPERTIE_COLUMNS, filters=(), sort=None, after=None):
+        # Consultas de una página de items de un tipo, con las columnas pedidas
+        # de Properties en la misma consulta. Paginación por cursor en lugar de
+        # OFFSET, así cualquier página cuesta lo mismo:
+        # - sin sort, el orden es Item.id y after es el último id;
+        # - con sort=(name, descending), after es (valor, sort_id) del último
+        #   item: sort_id es ItemAttribute.id para los items con valor y Item.id
+        #   para los que no tienen.
+        # filters es una lista de (name, op, value) sobre ItemAttribute, donde
+        # name es el nombre de la API y op uno de ATTRIBUTE_OPERATORS.
+        # Genera las consultas (segmentos) que se ejecutan en orden hasta
+        # reunir limit filas; cada una se construye solo si hace falta. Con sort, primero los items con valor, en
+        # el orden del índice ix_item_attribute_num/_text (valor, id), y
+        # después los items sin valor, por Item.id.
+        if sort is None:
+            stmt = Item._list_select(type_item, columns, filters).where(Item.type_item == type_item)
+            if after is not None:
+                stmt = stmt.where(Item.id > after)
+            yield stmt.order_by(Item.id).limit(limit)
+            return
+
+        name, descending = sort
+        value, last_id = after if after is not None else (None, None)
+        if after is None or value is not None:
+            yield Item._sorted_segment(type_item, columns, filters, name, descending, after, limit)
+        yield Item._null_segment(type_item, columns, filters, name, descending,
+                                 last_id if after is not None and value is None else None, limit)
+
+    @staticmethod
+    def _list_select(type_item, columns, filters, attribute=None):
+        # SELECT de los listados; con attribute la consulta parte de esa fila
+        # de ItemAttribute (la del orden) y se une a Item por prop_id
+        stmt = select(Item.id, Item.uid, Item.description, Item.version,
+                      *[getattr(Properties, column) for column in columns])
+        if attribute is not None:
+            stmt = stmt.select_from(attribute).join(Item, Item.prop_id == attribute.prop_id)
+        stmt = stmt.outerjoin(Properties, Properties.propertie_id == Item.prop_id)
+        for index, (name, op, value) in enumerate(filters):
+            filtered = Item._attribute_alias(f"filter_{index}")
+            stmt = stmt.join(filtered, and_(
+                filtered.prop_id == Item.prop_id,
+                filtered.type_item == type_item,
+                filtered.name == name))
+            stmt = stmt.where(ATTRIBUTE_OPERATORS[op](ItemAttribute.value_column(filtered, name), value))
+        return stmt
+
+    @staticmethod
+    @cache
+    def _attribute_alias(role):
+        # Alias de ItemAttribute reutilizados entre peticiones: crearlos en cada
+        # consulta cuesta más que ejecutarla, y con los mismos alias SQLAlchemy
+        # reutiliza la compilación de la consulta
+        return aliased(ItemAttribute, name=f"{role}_attribute")
+
+    @staticmethod
+    def _sorted_segment(type_item, columns, filters, name, descending, after, limit):
+        # Items con valor: recorre el índice (type_item, name, valor, id) desde
+        # el cursor, sin ordenar nada; los empates se desempatan por el id del
+        # atributo, que es la última columna del índice
+        attribute = Item._attribute_alias("sort")
+        column = ItemAttribute.value_column(attribute, name)
+        stmt = (
+            Item._list_select(type_item, columns, filters, attribute)
+            .add_columns(column.label("sort_value"), attribute.id.label("sort_id"))
+            .where(attribute.type_item == type_item, attribute.name == name, column.is_not(None))
+        )
+        if after is not None:
+            # Rango sobre el índice más la exclusión de los empates ya servidos
+            value, last_id = after
+            if descending:
+                stmt = stmt.where(column <= value, or_(column < value, attribute.id < last_id))
+            else:
+                stmt = stmt.where(column >= value, or_(column > value, attribute.id > last_id))
+        if descending:
+            stmt = stmt.order_by(column.desc(), attribute.id.desc())
+        else:
+            stmt = stmt.order_by(column.asc(), attribute.id)
+        return stmt.limit(limit)
+
+    @staticmethod
+    def _null_segment(type_item, columns, filters, name, descending, last_id, limit):
+        # Items sin valor (o sin fila de atributo): van al final en ambos sentidos
+        attribute = Item._attribute_alias("sort")
+        has_value = (
+            select(attribute.id)
+            .where(attribute.prop_id == Item.prop_id, attribute.name == name,
+                   ItemAttribute.value_column(attribute, name).is_not(None))
+            .exists()
+        )
+        stmt = (
+            Item._list_select(type_item, columns, filters)
+            .add_columns(literal(None).label("sort_value"), Item.id.label("sort_id"))
+            .where(Item.type_item == type_item, ~has_value)
+        )
+        if last_id is not None:
+            stmt = stmt.where(Item.id < last_id if descending else Item.id > last_id)
+        return stmt.order_by(Item.id.desc() if descending else Item.id).limit(limit)
+
+    @staticmethod
+    def list_with_properties(type_item, limit=20, columns=PROPERTIE_COLUMNS, filters=(), sort=None, after=None):
+        # Devuelve las filas (Row) tal cual, para codificarlas sin dicts intermedios
+        try:
+            rows = []
+            for stmt in Item.list_statements(type_item, limit, columns, filters, sort, after):
+                rows += db.session.execute(stmt).all()
+                if len(rows) >= limit:
+                    break
+            return True, rows[:limit]
+        except SQLAlchemyError:
+            db.session.rollback()
+            return False, []
+
+    @staticmethod
+    def explain(stmt, session=None):
+        # Plan de ejecución de una consulta, para comprobar el uso de índices
+        session = session or db.session
+        bind = session.get_bind()
+        sql = str(stmt.compile(dialect=bind.dialect, compile_kwargs={"literal_binds": True}))
+        prefix = "EXPLAIN QUERY PLAN " if bind.dialect.name == "sqlite" else "EXPLAIN "
+        plan = session.execute(text(prefix + sql)).all()
+        return {"sql": sql, "plan": [" ".join(str(col) for col in row) for row in plan]}
+
     @staticmethod
     def delete_item(id: int):
         try:
@@ -332,8 +976,355 @@ class Properties(Base):
             db.session.rollback()
             return False, {"error": str(e)}
 
-try:
-    render_er(Base, 'diagram.png')
-    print("✅ Diagrama generado correctamente como diagram.png")
-except Exception as e:
-    print("❌ Error generando el diagrama:", e)
+# ItemAttribute guarda cada property con su nombre de la API y, si es numérica,
+# también como número, para poder indexar, filtrar por rango y ordenar.
+# Properties sigue siendo la fuente de las respuestas de la API.
+class ItemAttribute(Base):
+    __tablename__ = "item_attribute"
+    __table_args__ = (
+        UniqueConstraint("prop_id", "name", name="uq_item_attribute_prop_id_name"),
+        # id al final: los listados ordenados recorren el índice en orden (valor, id)
+        Index("ix_item_attribute_num", "type_item", "name", "num_value", "id"),
+        Index("ix_item_attribute_text", "type_item", "name", "text_value", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    prop_id: Mapped[str] = mapped_column(
+        String(50), ForeignKey('item.prop_id'), nullable=False)
+    type_item: Mapped[str] = mapped_column(String(50), nullable=False)
+    name: Mapped[str] = mapped_column(String(50), nullable=False)
+    num_value: Mapped[float] = mapped_column(Float, nullable=True)
+    text_value: Mapped[str] = mapped_column(String(255), nullable=True)
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "prop_id": self.prop_id,
+            "type_item": self.type_item,
+            "name": self.name,
+            "num_value": self.num_value,
+            "text_value": self.text_value
+        }
+
+    @staticmethod
+    def value_column(attribute, name):
+        # Columna con la que se compara u ordena una property
+        return attribute.num_value if name in NUMERIC_PROPERTIES else attribute.text_value
+
+    @staticmethod
+    def to_number(value):
+        # "1,000" -> 1000.0; "unknown", "n/a" o vacío -> None
+        if value is None:
+            return None
+        try:
+            number = float(str(value).replace(",", "").strip())
+        except ValueError:
+            return None
+        return number if math.isfinite(number) else None
+
+    @staticmethod
+    def rows_for(type_item: str, prop_id: str, prop: dict, names=None):
+        # Filas de atributos a partir de las columnas propertie_N de Properties
+        prop_map = PROPERTY_MAPS.get(type_item.lower())
+        if prop_map is None:
+            return []
+        rows = []
+        for db_key, api_key in prop_map:
+            if db_key not in prop or (names is not None and api_key not in names):
+                continue
+            value = prop[db_key]
+            rows.append({
+                "prop_id": prop_id,
+                "type_item": type_item,
+                "name": api_key,
+                "num_value": ItemAttribute.to_number(value) if api_key in NUMERIC_PROPERTIES else None,
+                "text_value": None if value is None else str(value)
+            })
+        return rows
+
+    @staticmethod
+    def replace_for(type_item: str, prop_id: str, prop: dict, names=None):
+        # Reescribe los atributos de un item (o solo los de names).
+        # No hace commit: forma parte de la transacción de quien la llama.
+        stmt = delete(ItemAttribute).where(ItemAttribute.prop_id == prop_id)
+        if names is not None:
+            stmt = stmt.where(ItemAttribute.name.in_(names))
+        db.session.execute(stmt)
+        rows = ItemAttribute.rows_for(type_item, prop_id, prop, names)
+        if rows:
+            db.session.execute(insert(ItemAttribute), rows)
+
+    @staticmethod
+    def delete_for(prop_ids):
+        # Elimina los atributos de varios items; no hace commit
+        db.session.execute(delete(ItemAttribute).where(ItemAttribute.prop_id.in_(list(prop_ids))))
+
+# Índice de texto completo sobre el nombre y la descripción de los items.
+# SQLite usa una tabla virtual FTS5; PostgreSQL una tabla con una columna
+# tsvector generada e indexada con GIN. La tabla la crea la migración
+# (o ensure() en una base local) y se mantiene desde las escrituras de items.
+class SearchIndex:
+    # En PostgreSQL la tabla (tsvector + índice GIN) la crea la migración
+    # 0c9460c711d8; en SQLite (desarrollo y pruebas) se crea aquí si falta
+    SQLITE_DDL = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS item_search USING fts5("
+        "prop_id UNINDEXED, type_item UNINDEXED, uid UNINDEXED, name, description, "
+        "tokenize = 'unicode61 remove_diacritics 2')",
+    ]
+    _ready = False
+
+    @staticmethod
+    def ensure():
+        # Crea la tabla FTS5 de SQLite si no existe (una vez por proceso), en
+        # su propia transacción para no mezclarse con la sesión de la petición.
+        # Con otras bases no se ejecuta DDL en tiempo de ejecución.
+        if SearchIndex._ready:
+            return
+        if db.engine.dialect.name == "sqlite":
+            with db.engine.begin() as connection:
+                for ddl in SearchIndex.SQLITE_DDL:
+                    connection.execute(text(ddl))
+        SearchIndex._ready = True
+
+    @staticmethod
+    def name_of(type_item: str, prop: dict):
+        for db_key, api_key in PROPERTY_MAPS.get(type_item.lower(), []):
+            if api_key == "name":
+                return prop.get(db_key) or ""
+        return ""
+
+    @staticmethod
+    def replace(rows):
+        # rows: [{"prop_id", "type_item", "uid", "name", "description"}]
+        # No hace commit: forma parte de la transacción de quien la llama.
+        if not rows:
+            return
+        SearchIndex.remove([row["prop_id"] for row in rows])
+        db.session.execute(text(
+            "INSERT INTO item_search (prop_id, type_item, uid, name, description) "
+            "VALUES (:prop_id, :type_item, :uid, :name, :description)"), rows)
+
+    @staticmethod
+    def remove(prop_ids):
+        stmt = text("DELETE FROM item_search WHERE prop_id IN :prop_ids").bindparams(
+            bindparam("prop_ids", expanding=True))
+        db.session.execute(stmt, {"prop_ids": list(prop_ids)})
+
+    @staticmethod
+    def update_description(prop_id: str, description: str):
+        SearchIndex.update_column("description", [{"prop_id": prop_id, "value": description or ""}])
+
+    @staticmethod
+    def update_column(column: str, rows):
+        # rows: [{"prop_id", "value"}]; column es "name" o "description"
+        if not rows:
+            return
+        if column not in ("name", "description"):
+            raise ValueError(f"Unknown search column: {column}")
+        db.session.execute(
+            text(f"UPDATE item_search SET {column} = :value WHERE prop_id = :prop_id"), rows)
+
+    @staticmethod
+    def row_for(item: dict, prop: dict):
+        return {
+            "prop_id": item["prop_id"],
+            "type_item": item["type_item"],
+            "uid": str(item["uid"]),
+            "name": SearchIndex.name_of(item["type_item"], prop),
+            "description": item.get("description") or ""
+        }
+
+    @staticmethod
+    def rebuild():
+        # Regenera todo el índice a partir de item y properties
+        SearchIndex.ensure()
+        db.session.execute(text("DELETE FROM item_search"))
+        rows = db.session.execute(
+            select(Item.prop_id, Item.type_item, Item.uid, Item.description,
+                   Properties.propertie_1, Properties.propertie_3)
+            .join(Properties, Properties.propertie_id == Item.prop_id)
+        ).mappings().all()
+        SearchIndex.replace([SearchIndex.row_for(row, row) for row in rows])
+        db.session.commit()
+        return len(rows)
+
+    @staticmethod
+    def search_statement(dialect: str, query: str, type_item=None, limit=20, offset=0, candidates=500):
+        # Consulta de search() para el dialecto dado; None si query no tiene palabras.
+        # Solo se ordena por relevancia un conjunto acotado de candidatos: hasta
+        # candidates coincidencias en el nombre más hasta candidates en cualquier
+        # columna. Las palabras comunes de las descripciones (p. ej. "person")
+        # coinciden con toda la tabla y calcular la relevancia de todas las filas
+        # antes del LIMIT es lo que cuesta. Más allá de los candidatos no hay
+        # más páginas.
+        tokens = re.findall(r"\w+", query.lower())
+        if not tokens:
+            return None
+        params = {"limit": limit, "offset": offset, "candidates": candidates}
+        type_filter = ""
+        if type_item:
+            params["type_item"] = type_item
+            type_filter = " AND type_item = :type_item"
+        if dialect == "sqlite":
+            # Todas las palabras; la última también como prefijo
+            terms = " ".join(f'"{token}"' for token in tokens) + "*"
+            params["query"] = terms
+            params["name_query"] = "{name} : (" + terms + ")"
+            # bm25 depende de la expresión de cada MATCH: se queda el mejor valor
+            candidate = (
+                "SELECT * FROM (SELECT prop_id, type_item, uid, name, description, "
+                "bm25(item_search, 0, 0, 0, 10.0, 1.0) AS rank "
+                "FROM item_search WHERE item_search MATCH {match}" + type_filter + " LIMIT :candidates)")
+            sql = (
+                "SELECT prop_id, type_item, uid, name, description, min(rank) AS rank FROM (" +
+                candidate.format(match=":name_query") + " UNION ALL " + candidate.format(match=":query") +
+                ") GROUP BY prop_id ORDER BY rank, prop_id LIMIT :limit OFFSET :offset")
+        else:
+            # El peso A (nombre) del tsvector limita la primera búsqueda al nombre
+            params["query"] = " & ".join(tokens) + ":*"
+            params["name_query"] = " & ".join(f"{token}:A" for token in tokens[:-1]) + \
+                (" & " if len(tokens) > 1 else "") + f"{tokens[-1]}:*A"
+            candidate = (
+                "(SELECT prop_id, type_item, uid, name, description, "
+                "ts_rank(document, to_tsquery('simple', :query)) AS rank "
+                "FROM item_search WHERE document @@ to_tsquery('simple', {match})" + type_filter +
+                " LIMIT :candidates)")
+            sql = (
+                "SELECT prop_id, type_item, uid, name, description, rank FROM (" +
+                candidate.format(match=":name_query") + " UNION " + candidate.format(match=":query") +
+                ") AS candidates ORDER BY rank DESC, prop_id LIMIT :limit OFFSET :offset")
+        return text(sql).bindparams(**params)
+
+    @staticmethod
+    def search(query: str, type_item=None, limit=20, offset=0, candidates=500):
+        # Resultados ordenados por relevancia; el nombre pesa más que la descripción
+        try:
+            stmt = SearchIndex.search_statement(
+                db.session.get_bind().dialect.name, query, type_item, limit, offset, candidates)
+            if stmt is None:
+                return True, []
+            rows = db.session.execute(stmt).mappings().all()
+            return True, [dict(row) for row in rows]
+        except SQLAlchemyError:
+            db.session.rollback()
+            return False, []
+
+# ItemDocument guarda la respuesta de GET /items/<type_item>/<uid> ya
+# serializada, regenerada en cada escritura del item. Con enabled (config
+# ITEM_DOCUMENTS) la lectura es una sola consulta por índice cuyo cuerpo se
+# devuelve tal cual. Solo se sirve si su versión coincide con la del item.
+class ItemDocument(Base):
+    __tablename__ = "item_document"
+    __table_args__ = (
+        Index("ix_item_document_type_item_uid", "type_item", "uid"),
+    )
+
+    prop_id: Mapped[str] = mapped_column(
+        String(50), ForeignKey('item.prop_id'), primary_key=True)
+    type_item: Mapped[str] = mapped_column(String(50), nullable=False)
+    uid: Mapped[str] = mapped_column(String(50), nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+
+    enabled = False
+
+    def serialize(self):
+        return {
+            "prop_id": self.prop_id,
+            "type_item": self.type_item,
+            "uid": self.uid,
+            "version": self.version,
+            "body": self.body
+        }
+
+    @staticmethod
+    def encode(item: dict, prop: dict):
+        # Mismo JSON que produce jsonify({"result": ...}); None si el tipo no tiene mapeo
+        prop_map = PROPERTY_MAPS.get(item["type_item"].lower())
+        if prop_map is None:
+            return None
+        payload = {"result": build_result(item, prop, prop_map)}
+        return dumps(payload).decode() + "\n"
+
+    @staticmethod
+    def replace(pairs):
+        # Regenera los documentos de los pares (item, properties).
+        # No hace commit: forma parte de la transacción de quien la llama.
+        if not ItemDocument.enabled:
+            return
+        rows = []
+        for item, prop in pairs:
+            body = ItemDocument.encode(item, prop)
+            if body is not None:
+                rows.append({
+                    "prop_id": item["prop_id"],
+                    "type_item": item["type_item"],
+                    "uid": str(item["uid"]),
+                    "version": item["version"],
+                    "body": body
+                })
+        if rows:
+            ItemDocument.remove([row["prop_id"] for row in rows])
+            db.session.execute(insert(ItemDocument), rows)
+
+    @staticmethod
+    def refresh(prop_ids):
+        # Como replace, leyendo antes item y properties en una sola consulta
+        if not ItemDocument.enabled or not prop_ids:
+            return
+        rows = db.session.execute(
+            select(Item, Properties)
+            .join(Properties, Properties.propertie_id == Item.prop_id)
+            .where(Item.prop_id.in_(list(prop_ids)))
+        ).all()
+        ItemDocument.replace([(item.serialize(), prop.serialize()) for item, prop in rows])
+
+    @staticmethod
+    def remove(prop_ids):
+        # Siempre se borra, aunque no esté habilitado, por la clave foránea a item
+        db.session.execute(delete(ItemDocument).where(ItemDocument.prop_id.in_(list(prop_ids))))
+
+    @staticmethod
+    def get_statement(type_item, uid):
+        return (
+            select(ItemDocument.body, ItemDocument.version)
+            .join(Item, and_(Item.prop_id == ItemDocument.prop_id,
+                             Item.version == ItemDocument.version))
+            .where(ItemDocument.type_item == type_item, ItemDocument.uid == uid)
+            .limit(1)
+        )
+
+    @staticmethod
+    def get(type_item, uid):
+        # (body, version) del documento vigente, o None si falta o está desactualizado
+        try:
+            row = db.session.execute(ItemDocument.get_statement(type_item, uid)).first()
+            return True, tuple(row) if row is not None else None
+        except SQLAlchemyError:
+            db.session.rollback()
+            return False, None
+
+    @staticmethod
+    def rebuild(batch_size: int = 500):
+        # Regenera todos los documentos, recorriendo los items por id en lotes
+        enabled, ItemDocument.enabled = ItemDocument.enabled, True
+        try:
+            db.session.execute(delete(ItemDocument))
+            count, last_id = 0, 0
+            while True:
+                rows = db.session.execute(
+                    select(Item, Properties)
+                    .join(Properties, Properties.propertie_id == Item.prop_id)
+                    .where(Item.id > last_id)
+                    .order_by(Item.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                ItemDocument.replace([(item.serialize(), prop.serialize()) for item, prop in rows])
+                count += len(rows)
+                last_id = rows[-1][0].id
+            db.session.commit()
+            return count
+        finally:
+            ItemDocument.enabled = enabled
@@ -0,0 +1,113 @@
+"""
+Configuración del pool de conexiones de SQLAlchemy y métricas de espera.
+
+Cada worker de gunicorn tiene su propio pool: workers * (pool_size +
+max_overflow) no debe superar max_connections de Postgres. Con un pooler
+externo (p. ej. PgBouncer en localhost) se usa mode "external": NullPool,
+una conexión por checkout que el pooler reparte entre los workers.
+"""
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import NullPool, QueuePool
+
+POOL_MODES = ("internal", "external")
+
+
+class TimedQueuePool(QueuePool):
+    # QueuePool que mide cuánto espera cada checkout y cuántos agotan el timeout
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self._checkouts = 0
+        self._waited = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._peak = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            with self._metrics_lock:
+                self._timeouts += 1
+            raise
+        wait = time.perf_counter() - start
+        with self._metrics_lock:
+            self._checkouts += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            # Más de 1 ms: el checkout tuvo que esperar o abrir una conexión
+            if wait > 0.001:
+                self._waited += 1
+            self._peak = max(self._peak, self.checkedout())
+        return connection
+
+    def metrics(self):
+        capacity = self.size() + max(self._max_overflow, 0)
+        with self._metrics_lock:
+            return {
+                "mode": "internal",
+                "pool_size": self.size(),
+                "max_overflow": self._max_overflow,
+                "timeout": self._timeout,
+                "checked_out": self.checkedout(),
+                "checked_in": self.checkedin(),
+                "overflow": self.overflow(),
+                "peak_checked_out": self._peak,
+                "saturation": round(self.checkedout() / capacity, 3) if capacity else None,
+                "checkouts": self._checkouts,
+                "waited": self._waited,
+                "timeouts": self._timeouts,
+                "wait_avg_ms": round(self._wait_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3)
+            }
+
+
+def engine_options(mode="internal", pool_size=5, max_overflow=10, timeout=30, recycle=1800, pre_ping=True):
+    # Opciones para SQLALCHEMY_ENGINE_OPTIONS (create_engine); timeout en
+    # segundos enteros, SQLAlchemy lo convierte a int
+    if mode not in POOL_MODES:
+        raise ValueError(f"Unknown pool mode: {mode}")
+    if mode == "external":
+        # El pooler gestiona reciclado y límites; pre_ping sigue detectando
+        # conexiones que el pooler haya cerrado
+        return {"poolclass": NullPool, "pool_pre_ping": pre_ping}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": timeout,
+        "pool_recycle": recycle,
+        "pool_pre_ping": pre_ping
+    }
+
+
+def admin_engine_options(options):
+    # Las mismas opciones con un pool mínimo para la app del admin: una
+    # conexión por worker y sin desborde. Con NullPool no cambia nada.
+    options = dict(options)
+    if "pool_size" in options:
+        options.update(pool_size=1, max_overflow=0)
+    return options
+
+
+def async_engine_options(options):
+    # Las mismas opciones para create_async_engine: TimedQueuePool es síncrono,
+    # así que el motor asíncrono usa su AsyncAdaptedQueuePool por defecto
+    options = dict(options)
+    if options.get("poolclass") is TimedQueuePool:
+        del options["poolclass"]
+    return options
+
+
+def pool_metrics(engine):
+    pool = engine.pool
+    if isinstance(pool, TimedQueuePool):
+        return pool.metrics()
+    if isinstance(pool, NullPool):
+        return {"mode": "external"}
+    return {"mode": type(pool).__name__, "status": pool.status()}
@@ -0,0 +1,106 @@
+"""
+Serialización JSON de las respuestas: orjson si está instalado, json de la
+librería estándar si no. La salida es equivalente a la de Flask por defecto
+(claves ordenadas, sin espacios).
+"""
+import json
+from operator import itemgetter
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+# Argumentos de json.dumps que también se pueden expresar con orjson
+ORJSON_KWARGS = {"default", "sort_keys", "indent", "separators", "ensure_ascii"}
+
+
+def dumps(obj, default=None, sort_keys=True, indent=False):
+    # Codifica obj directamente a bytes UTF-8
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+    if indent:
+        return json.dumps(obj, default=default, sort_keys=sort_keys, indent=2).encode()
+    return json.dumps(obj, default=default, sort_keys=sort_keys, separators=(",", ":")).encode()
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    # Proveedor de app.json: jsonify, request.get_json y los errores usan el
+    # codificador rápido; las fechas y Decimal se convierten igual que en Flask
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or not kwargs.keys() <= ORJSON_KWARGS:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, default=kwargs.get("default", self.default),
+                     sort_keys=kwargs.get("sort_keys", self.sort_keys),
+                     indent=bool(kwargs.get("indent"))).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Igual que DefaultJSONProvider.response, pero sin pasar por str
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = dumps(obj, default=self.default, sort_keys=self.sort_keys, indent=indent)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+class ItemEncoder:
+    # Codifica filas de Item.list_with_properties (tuplas con item.id, uid,
+    # description, version y columnas de Properties) a bytes. Por fila crea
+    # solo los dos dicts de la respuesta (item y properties) leyendo la tupla
+    # por índice, en lugar de dict(row) + build_result; como se crean ya en
+    # orden alfabético no hace falta ordenar claves al codificar.
+
+    def __init__(self, prop_map, common=(), fields=None):
+        keys = [(key, key) for key in common] + [(api_key, db_key) for db_key, api_key in prop_map]
+        self.properties = sorted((api_key, db_key) for api_key, db_key in keys
+                                 if fields is None or api_key in fields)
+        self._columns = None
+        self._getter = None
+
+    def _compile(self, fields):
+        # Índices de las columnas en la fila, calculados una vez por consulta
+        positions = {name: index for index, name in enumerate(fields)}
+        self._columns = (positions["version"], positions["description"], positions["uid"])
+        indexes = [positions[db_key] for _, db_key in self.properties]
+        if len(indexes) == 1:
+            getter = itemgetter(indexes[0])
+            self._getter = lambda row: (getter(row),)
+        elif indexes:
+            self._getter = itemgetter(*indexes)
+        else:
+            self._getter = lambda row: ()
+
+    def results(self, rows):
+        if not rows:
+            return []
+        if self._getter is None:
+            self._compile(rows[0]._fields)
+        version, description, uid = self._columns
+        names = [api_key for api_key, _ in self.properties]
+        return [{
+            "__v": row[version],
+            "description": row[description],
+            "properties": dict(zip(names, self._getter(row))),
+            "uid": row[uid]
+        } for row in rows]
+
+    def page(self, rows, next_cursor):
+        # Cuerpo completo de GET /items/<type_item>: {"next": ..., "results": [...]}
+        return dumps({"next": next_cursor, "results": self.results(rows)}, sort_keys=False) + b"\n"
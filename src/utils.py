@@ -1,4 +1,7 @@
+import base64
+import json
 from flask import jsonify, url_for
+from serializers import loads
 
 class APIException(Exception):
     status_code = 400
@@ -15,13 +18,51 @@ class APIException(Exception):
         rv['message'] = self.message
         return rv
 
+# Tamaño máximo de una línea NDJSON (un item serializado)
+NDJSON_MAX_LINE = 1024 * 1024
+
+def iter_ndjson(stream, max_line=NDJSON_MAX_LINE):
+    # Lee un objeto JSON por línea sin cargar todo el cuerpo en memoria.
+    # Las líneas inválidas o demasiado largas se devuelven como None.
+    while True:
+        line = stream.readline(max_line)
+        if not line:
+            break
+        if len(line) >= max_line and not line.endswith(b"\n"):
+            # Descarta el resto de la línea sin acumularla
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(max_line)
+            yield None
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield loads(line)
+        except ValueError:
+            yield None
+
+def encode_cursor(*values):
+    # Cursor opaco para la paginación por clave (p. ej. valor de orden + id)
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    # Inverso de encode_cursor; None si el cursor no es válido
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
 def has_no_empty_params(rule):
     defaults = rule.defaults if rule.defaults is not None else ()
     arguments = rule.arguments if rule.arguments is not None else ()
     return len(defaults) >= len(arguments)
 
 def generate_sitemap(app):
-    links = ['/admin/']
+    links = ['/admin/'] if app.config.get('ENABLE_ADMIN') else []
     for rule in app.url_map.iter_rules():
         # Filter out rules we can't navigate to in a browser
         # and rules that require parameters